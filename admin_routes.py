@@ -0,0 +1,202 @@
+import hmac
+import os
+from flask import Blueprint, request, url_for, jsonify
+from database import get_all_surveys
+from jobs import enqueue, get_queue
+from monday_client import BOARD_ID
+from backfill import BACKFILL_BATCH_SIZE
+from routes import survey_base_url
+# Backfills can queue the survey_artifacts task
+import artifact_jobs  # noqa: F401
+
+# Admin endpoints are disabled until a token is configured
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+bp = Blueprint('admin', __name__)
+
+def _admin_error():
+    """Error response unless the request carries the admin token, else None"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (ADMIN_TOKEN is not set)"}), 403
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+@bp.route('/')
+def index():
+    """Home page"""
+    return """
+    <html>
+    <head>
+        <title>Sistema de Pesquisa NPS de Viagem</title>
+        <style>
+            body { 
+                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                text-align: center;
+                padding: 50px;
+                margin: 0;
+                min-height: 100vh;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                flex-direction: column;
+            }
+            .container {
+                background: rgba(255, 255, 255, 0.1);
+                backdrop-filter: blur(10px);
+                border-radius: 20px;
+                padding: 40px;
+                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            }
+            h1 { font-size: 3em; margin-bottom: 20px; }
+            p { font-size: 1.2em; opacity: 0.9; }
+            .btn {
+                display: inline-block;
+                padding: 12px 24px;
+                margin: 10px;
+                background: rgba(255, 255, 255, 0.2);
+                color: white;
+                text-decoration: none;
+                border-radius: 10px;
+                font-weight: 600;
+                transition: all 0.3s ease;
+            }
+            .btn:hover {
+                background: rgba(255, 255, 255, 0.3);
+                transform: translateY(-2px);
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>🌍 Sistema de Pesquisa NPS de Viagem</h1>
+            <p>Endpoint webhook pronto para receber dados do Monday.com</p>
+            <p>Pesquisas serão geradas automaticamente quando webhooks forem recebidos</p>
+            <br>
+            <a href="/surveys" class="btn">Ver Todas as Pesquisas</a>
+        </div>
+    </body>
+    </html>
+    """
+
+@bp.route('/surveys')
+def list_surveys():
+    """List all surveys"""
+    surveys = get_all_surveys()
+
+    html = """
+    <html>
+    <head>
+        <title>Todas as Pesquisas</title>
+        <style>
+            body { 
+                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 20px;
+                margin: 0;
+                min-height: 100vh;
+            }
+            .container { max-width: 1200px; margin: 0 auto; }
+            h1 { text-align: center; margin-bottom: 30px; }
+            .survey-card {
+                background: rgba(255, 255, 255, 0.1);
+                backdrop-filter: blur(10px);
+                border-radius: 15px;
+                padding: 20px;
+                margin: 15px 0;
+                box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
+            }
+            .survey-title { font-size: 1.5em; margin-bottom: 10px; color: #fff; }
+            .survey-info { margin: 5px 0; opacity: 0.9; }
+            .survey-actions { margin-top: 15px; }
+            .btn {
+                display: inline-block;
+                padding: 8px 16px;
+                margin: 5px;
+                background: rgba(255, 255, 255, 0.2);
+                color: white;
+                text-decoration: none;
+                border-radius: 8px;
+                font-weight: 600;
+                transition: all 0.3s ease;
+            }
+            .btn:hover {
+                background: rgba(255, 255, 255, 0.3);
+                transform: translateY(-1px);
+            }
+            .submissions-count {
+                background: rgba(0, 255, 0, 0.2);
+                padding: 4px 8px;
+                border-radius: 12px;
+                font-size: 0.9em;
+                margin-left: 10px;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>📋 Todas as Pesquisas Criadas</h1>
+    """
+
+    for survey in surveys:
+        html += f"""
+            <div class="survey-card">
+                <div class="survey-title">
+                    {survey['trip_name']}
+                    <span class="submissions-count">{survey['submission_count']} respostas</span>
+                </div>
+                <div class="survey-info">📍 <strong>Destino:</strong> {survey['location']}</div>
+                <div class="survey-info">📅 <strong>Data:</strong> {survey['date']}</div>
+                <div class="survey-info">🏢 <strong>Empresa:</strong> {survey['company_name']}</div>
+                <div class="survey-info">🕒 <strong>Criado em:</strong> {survey['created_at']}</div>
+                <div class="survey-actions">
+                    <a href="/survey/{survey['survey_id']}" class="btn">Abrir Pesquisa</a>
+                    <a href="/survey/{survey['survey_id']}/pdf" class="btn">Download PDF</a>
+                </div>
+            </div>
+        """
+
+    html += """
+            <div style="text-align: center; margin-top: 30px;">
+                <a href="/" class="btn">Voltar ao Início</a>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    return html
+
+@bp.route('/admin/backfill', methods=['POST'])
+def start_backfill():
+    """Queue a survey backfill for every item of the board"""
+    error = _admin_error()
+    if error:
+        return error
+    # Without workers (JOB_WORKERS=0, e.g. Vercel) the job would run the whole board inside this request
+    if get_queue().workers <= 0:
+        return jsonify({"error": "Backfills need background workers (JOB_WORKERS > 0); "
+                                 "run `python backfill.py` instead"}), 503
+
+    options = request.get_json(silent=True) or {}
+    try:
+        job_id = enqueue('board_backfill', {
+            'board_id': str(options.get('board_id', BOARD_ID)),
+            'batch_size': int(options.get('batch_size', BACKFILL_BATCH_SIZE)),
+            'resume': bool(options.get('resume', False)),
+            'item_ids': [str(item_id) for item_id in options.get('item_ids') or []] or None,
+            'artifacts': bool(options.get('artifacts', False)),
+            'base_url': survey_base_url()
+        })
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid backfill options"}), 400
+
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "job_status_url": url_for('core.job_status', job_id=job_id, _external=True)
+    }), 202
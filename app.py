@@ -3,13 +3,36 @@ import logging
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# DEBUG logs every request and Monday.com payload; opt in with LOG_LEVEL=DEBUG
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+app = None
 
-# Import routes to register them with the app
-from routes import *
+
+def create_app():
+    """Create the Flask app and register its routes (once per process)"""
+    global app
+    if app is not None:
+        return app
+
+    # Configure logging
+    logging.basicConfig(level=LOG_LEVEL)
+
+    # Create the app
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    # One proxy (Vercel / the load balancer) in front: remote_addr is the client it saw
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
+
+    # Fingerprinted static bundles (python assets.py build), CDN assets otherwise
+    from assets import init_assets
+    init_assets(app)
+
+    # Blueprints of the roles in APP_ROLES (all by default); PDF, image and HTTP
+    # libraries are imported on first use, not here
+    from routes import register_blueprints
+    register_blueprints(app)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from singleflight import SingleFlight
+
+# Rendered artifact cache configuration
+ARTIFACT_CACHE_DIR = os.environ.get("ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "avaliacao_artifacts"))
+ARTIFACT_MEMORY_BYTES = int(os.environ.get("ARTIFACT_MEMORY_BYTES", str(32 * 1024 * 1024)))
+ARTIFACT_DISK_BYTES = int(os.environ.get("ARTIFACT_DISK_BYTES", str(256 * 1024 * 1024)))
+ARTIFACT_MAX_AGE = int(os.environ.get("ARTIFACT_MAX_AGE", "300"))
+ARTIFACT_TRACKED_OWNERS = int(os.environ.get("ARTIFACT_TRACKED_OWNERS", "10000"))
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_key(kind, template_version, fields, survey_data, survey_url):
+    """Content hash of everything that affects a rendered artifact"""
+    material = {
+        'kind': kind,
+        'template_version': template_version,
+        'fields': {field: survey_data.get(field) for field in fields},
+        'url': survey_url
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class BoundedLRU:
+    """Thread-safe LRU of bytes values bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value, evicting least recently used entries (values over max_bytes are not kept)"""
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class ArtifactCache:
+    """Two-tier (memory LRU + size-bounded disk) cache of rendered artifacts by content key"""
+
+    def __init__(self, directory=ARTIFACT_CACHE_DIR, memory_bytes=ARTIFACT_MEMORY_BYTES, disk_bytes=ARTIFACT_DISK_BYTES,
+                 tracked_owners=ARTIFACT_TRACKED_OWNERS):
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.tracked_owners = tracked_owners
+        self._memory = BoundedLRU(memory_bytes)
+        self._lock = threading.Lock()
+        # LRU like the memory tier; owners that fall out just leave their artifact to age out
+        self._latest = OrderedDict()
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Return cached bytes or None"""
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as artifact_file:
+                data = artifact_file.read()
+            os.utime(path)  # mtime is the disk tier's LRU clock
+        except OSError:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._memory.put(key, data)
+        return data
+
+    def open_file(self, key, count_hit=True):
+        """Open file of the artifact in the disk tier, or None (lets responses stream from disk)
+
+        The open descriptor keeps the data readable even if the disk tier evicts the file afterwards.
+        """
+        path = self._path(key)
+        try:
+            artifact_file = open(path, 'rb')
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mtime is the disk tier's LRU clock
+        except OSError:
+            pass
+        if count_hit:
+            self.disk_hits += 1
+        return artifact_file
+
+    def put(self, key, data):
+        self._memory.put(key, data)
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as artifact_file:
+                artifact_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write artifact {key} to disk: {e}")
+            return
+        self._evict_disk()
+
+    def invalidate(self, key):
+        self._memory.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def track(self, owner, key):
+        """Remember the current key for an owner (e.g. survey ID) and drop its previous artifact"""
+        with self._lock:
+            previous = self._latest.get(owner)
+            self._latest[owner] = key
+            self._latest.move_to_end(owner)
+            while len(self._latest) > self.tracked_owners:
+                self._latest.popitem(last=False)
+        if previous and previous != key:
+            self.invalidate(previous)
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier fits its budget"""
+        try:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+        except OSError:
+            return
+        if total <= self.disk_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        memory = self._memory.stats()
+        with self._lock:
+            return {
+                'memory_entries': memory['entries'],
+                'memory_bytes': memory['bytes'],
+                'tracked_owners': len(self._latest),
+                'memory_hits': memory['hits'],
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': memory['evictions'] + self.evictions
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_renders = SingleFlight()
+
+
+def get_artifact_cache():
+    """Get the process-wide artifact cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ArtifactCache()
+    return _cache
+
+
+def survey_pdf_key(survey_data, survey_url):
+    """Cache key (and ETag) for a survey's PDF"""
+    from pdf_generator import PDF_TEMPLATE_VERSION, PDF_FIELDS
+    return artifact_key('pdf', PDF_TEMPLATE_VERSION, PDF_FIELDS, survey_data, survey_url)
+
+
+def get_survey_pdf(survey_data, survey_url, key=None):
+    """Return the survey PDF bytes, rendering it only when the cache has no copy"""
+    cache = get_artifact_cache()
+    key = key or survey_pdf_key(survey_data, survey_url)
+    cache.track(('pdf', str(survey_data.get('survey_id'))), key)
+
+    pdf_data = cache.get(key)
+    if pdf_data is not None:
+        return pdf_data
+
+    def render():
+        from pdf_generator import create_survey_pdf
+        data = create_survey_pdf(survey_data, survey_url)
+        if data:
+            cache.put(key, data)
+        return data
+
+    return _renders.do(key, render)
+
+
+def get_survey_pdf_file(survey_data, survey_url, key=None):
+    """Return (open file, None) when the PDF is on disk, else (None, bytes) after rendering it"""
+    cache = get_artifact_cache()
+    key = key or survey_pdf_key(survey_data, survey_url)
+    pdf_file = cache.open_file(key)
+    if pdf_file is not None:
+        return pdf_file, None
+    return None, get_survey_pdf(survey_data, survey_url, key)
+
+
+def get_artifact_stats():
+    return get_artifact_cache().stats()
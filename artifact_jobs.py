@@ -0,0 +1,208 @@
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_cache import get_survey_pdf, survey_pdf_key
+from idempotency import claim_artifacts, release_artifacts
+from jobs import task, enqueue
+from monday_client import get_client, BOARD_ID
+from monday_items import monday_graphql_request
+
+logger = logging.getLogger(__name__)
+
+def update_survey_link(item_id, survey_url):
+    """Update the link column with survey URL"""
+    query = """
+    mutation($itemId: ID!, $boardId: ID!, $columnId: String!, $value: JSON!) {
+        change_column_value(
+            item_id: $itemId, 
+            board_id: $boardId, 
+            column_id: $columnId, 
+            value: $value
+        ) {
+            id
+        }
+    }
+    """
+
+    variables = {
+        "itemId": str(item_id),
+        "boardId": BOARD_ID,
+        "columnId": "text_mkrb8f7",
+        "value": f'"{survey_url}"'
+    }
+
+    # Setting the same link twice is harmless, so timeouts can be retried
+    result = monday_graphql_request(query, variables, idempotent=True)
+    return result
+
+def upload_file_to_monday(item_id, data, column_id="file_mkrk1fcz", file_type='application/pdf', filename=None):
+    """Upload file to Monday.com file column
+
+    data is in-memory bytes, a seekable file object (streamed) or a file path.
+    """
+
+    try:
+        if isinstance(data, str):
+            with open(data, 'rb') as file_content:
+                result = get_client().upload_file(item_id, column_id, filename or os.path.basename(data), file_content, file_type)
+        else:
+            result = get_client().upload_file(item_id, column_id, filename or 'file', data, file_type)
+
+        # Check for errors in response
+        if 'errors' in result:
+            logger.error(f"Monday.com upload error: {result['errors']}")
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Error uploading file to Monday.com: {str(e)}")
+        return {"errors": [str(e)]}
+
+def queue_survey_artifacts(survey_data, survey_url):
+    """Queue the link/PDF/PNG job unless it already ran for the same PDF fields and URL
+
+    Returns the job ID, or None when the artifacts are up to date.
+    """
+    survey_id = str(survey_data['survey_id'])
+    artifact_key = survey_pdf_key(survey_data, survey_url)
+    if not claim_artifacts(survey_id, artifact_key):
+        return None
+    try:
+        return enqueue('survey_artifacts', {
+            'survey_data': survey_data,
+            'survey_url': survey_url,
+            'artifact_key': artifact_key
+        })
+    except Exception:
+        release_artifacts(survey_id, artifact_key)
+        raise
+
+@task('survey_artifacts')
+def process_survey_artifacts(job):
+    """Update the survey link and upload the PDF and PNG to Monday.com (background job)"""
+    survey_data = job.payload['survey_data']
+    survey_url = job.payload['survey_url']
+    pulse_id = survey_data['pulse_id']
+    trip_name = survey_data.get('trip_name', 'Unknown Trip')
+    failed_steps = []
+
+    # Clean trip name for filenames (remove special characters)
+    clean_trip_name = re.sub(r'[^\w\s-]', '', trip_name)
+    clean_trip_name = re.sub(r'[-\s]+', '_', clean_trip_name)
+
+    # Update Monday.com with survey link
+    def update_link():
+        logger.info(f"Updating Monday.com item {pulse_id} with survey link: {survey_url}")
+
+        try:
+            update_result = update_survey_link(pulse_id, survey_url)
+            logger.debug(f"Monday.com update response: {update_result}")
+
+            if 'errors' in update_result:
+                logger.error(f"Monday.com API error: {update_result['errors']}")
+                failed_steps.append('link')
+            else:
+                logger.info("Successfully updated Monday.com with survey link")
+                job.mark_step('link')
+        except Exception as api_error:
+            logger.error(f"Exception when calling Monday.com API: {str(api_error)}")
+            failed_steps.append('link')
+
+    # Generate PDF with QR code
+    def upload_pdf():
+        try:
+            logger.debug("Starting PDF generation")
+            pdf_data = get_survey_pdf(survey_data, survey_url)
+
+            if pdf_data and len(pdf_data) > 0:
+                logger.debug(f"PDF generated, size: {len(pdf_data)} bytes")
+
+                # Upload PDF to Monday.com file column straight from memory
+                try:
+                    upload_result = upload_file_to_monday(pulse_id, pdf_data, filename=f"pesquisa_{clean_trip_name}.pdf")
+                    if 'errors' in upload_result:
+                        logger.error(f"Monday.com PDF upload error: {upload_result['errors']}")
+                        failed_steps.append('pdf')
+                    else:
+                        logger.info("Successfully uploaded PDF to Monday.com")
+                        job.mark_step('pdf')
+
+                except Exception as upload_error:
+                    logger.error(f"Exception when uploading PDF to Monday.com: {str(upload_error)}")
+                    failed_steps.append('pdf')
+            else:
+                logger.error("PDF generation returned empty data")
+                failed_steps.append('pdf')
+
+        except Exception as pdf_error:
+            logger.exception(f"Error generating PDF: {str(pdf_error)}")
+            failed_steps.append('pdf')
+
+    # Generate PNG image with QR code
+    def upload_png():
+        try:
+            # Imported on first use: PIL and qrcode are not needed to serve survey pages
+            from image_generator import create_survey_image, get_image_profile
+
+            logger.debug("Starting PNG image generation")
+            image_profile = get_image_profile()
+            image_data = create_survey_image(survey_data, survey_url, image_profile)
+
+            if image_data and len(image_data) > 0:
+                logger.debug(f"PNG image generated, size: {len(image_data)} bytes")
+
+                # Upload PNG to Monday.com file column file_mkrmkhse, named after the trip
+                try:
+                    upload_result = upload_file_to_monday(
+                        pulse_id, image_data, column_id="file_mkrmkhse", file_type=image_profile.content_type,
+                        filename=f"{clean_trip_name}.{image_profile.extension}"
+                    )
+                    if 'errors' in upload_result:
+                        logger.error(f"Monday.com PNG upload error: {upload_result['errors']}")
+                        failed_steps.append('png')
+                    else:
+                        logger.info("Successfully uploaded PNG to Monday.com")
+                        job.mark_step('png')
+
+                except Exception as upload_error:
+                    logger.error(f"Exception when uploading PNG to Monday.com: {str(upload_error)}")
+                    failed_steps.append('png')
+            else:
+                logger.error("PNG image generation returned empty data")
+                failed_steps.append('png')
+
+        except Exception as image_error:
+            logger.exception(f"Error generating PNG image: {str(image_error)}")
+            failed_steps.append('png')
+
+    def run_branch(name, branch):
+        """Run one branch, isolating its failures from the others"""
+        started = time.perf_counter()
+        try:
+            branch()
+        except Exception as e:
+            logger.error(f"Artifact branch '{name}' for item {pulse_id} crashed: {e}")
+            failed_steps.append(name)
+        logger.info(f"Artifact branch '{name}' for item {pulse_id} finished in {time.perf_counter() - started:.2f}s")
+
+    # The link update, PDF and PNG are independent: run them side by side so the
+    # job takes about as long as the slowest branch instead of the sum
+    branches = [(name, branch) for name, branch in (('link', update_link), ('pdf', upload_pdf), ('png', upload_png))
+                if not job.step_done(name)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(branches))) as pool:
+        for name, branch in branches:
+            pool.submit(run_branch, name, branch)
+    logger.info(f"Artifacts for item {pulse_id} took {time.perf_counter() - started:.2f}s ({len(branches)} branches)")
+
+    # Raising makes the queue retry; completed steps are skipped on the next attempt
+    if failed_steps:
+        if job.last_attempt and job.payload.get('artifact_key'):
+            # Let the next webhook for this item try again
+            release_artifacts(survey_data['survey_id'], job.payload['artifact_key'])
+        raise RuntimeError(f"Artifact steps failed for item {pulse_id}: {', '.join(failed_steps)}")
+
+    return {'survey_id': survey_data['survey_id'], 'steps': list(job.steps)}
@@ -0,0 +1,97 @@
+import logging
+import os
+from io import BytesIO
+from flask import Blueprint, current_app, request, send_file, stream_with_context
+from monday_items import load_survey
+from artifact_cache import get_survey_pdf_file, survey_pdf_key, ARTIFACT_MAX_AGE
+from routes import survey_link
+
+PRINT_SHEET_MAX_SURVEYS = int(os.environ.get("PRINT_SHEET_MAX_SURVEYS", "500"))
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('artifacts', __name__)
+
+@bp.route('/survey/<survey_id>/pdf')
+def download_pdf(survey_id):
+    """Download the PDF with QR code for the survey"""
+    survey = load_survey(survey_id)
+
+    if not survey:
+        return "Pesquisa não encontrada", 404
+
+    # PDFs are cached by a hash of their content, which doubles as the ETag
+    try:
+        survey_url = survey_link(survey_id)
+        pdf_key = survey_pdf_key(survey, survey_url)
+
+        if request.if_none_match.contains(pdf_key):
+            response = current_app.response_class(status=304)
+            response.set_etag(pdf_key)
+        else:
+            # Serve the disk-tier file (sendfile, no copy in Python) or the cached bytes as-is
+            pdf_file, pdf_data = get_survey_pdf_file(survey, survey_url, key=pdf_key)
+            if pdf_file is not None:
+                # Opened by the cache, so a later disk-tier eviction cannot pull the data away
+                length = os.fstat(pdf_file.fileno()).st_size
+            else:
+                pdf_file = BytesIO(pdf_data)  # shares the bytes object, no copy
+                length = len(pdf_data)
+            response = send_file(
+                pdf_file,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=f"pesquisa_{survey['trip_name'].replace(' ', '_')}.pdf",
+                etag=False,
+                conditional=False
+            )
+            response.content_length = length
+            response.set_etag(pdf_key)
+            # Handles If-None-Match, Range and If-Range
+            response.make_conditional(request, accept_ranges=True, complete_length=length)
+
+        response.cache_control.no_cache = None
+        response.cache_control.private = True
+        response.cache_control.max_age = ARTIFACT_MAX_AGE
+        return response
+    except Exception as e:
+        logger.error(f"Error generating PDF on-the-fly: {str(e)}")
+        return "Erro ao gerar PDF", 500
+
+@bp.route('/print-sheet')
+def print_sheet():
+    """One PDF with the QR cards of several surveys (?ids=1,2,3&cols=2&rows=2), streamed page by page"""
+    survey_ids = [survey_id.strip() for survey_id in request.args.get('ids', '').split(',') if survey_id.strip()]
+    if not survey_ids:
+        return "Informe os IDs das pesquisas (?ids=...)", 400
+    if len(survey_ids) > PRINT_SHEET_MAX_SURVEYS:
+        return f"Máximo de {PRINT_SHEET_MAX_SURVEYS} pesquisas por folha", 400
+
+    try:
+        columns = min(max(int(request.args.get('cols', 2)), 1), 6)
+        rows = min(max(int(request.args.get('rows', 2)), 1), 8)
+    except ValueError:
+        return "Parâmetros cols/rows inválidos", 400
+
+    surveys = []
+    for survey_id in survey_ids:
+        survey = load_survey(survey_id)
+        if survey:
+            surveys.append(survey)
+        else:
+            logger.warning(f"Print sheet: survey {survey_id} not found, skipping")
+    if not surveys:
+        return "Pesquisa não encontrada", 404
+
+    from pdf_generator import iter_print_sheet
+
+    # survey_link needs the request context while the body is generated
+    def survey_url(survey):
+        return survey_link(survey['survey_id'])
+
+    response = current_app.response_class(
+        stream_with_context(iter_print_sheet(surveys, survey_url, columns, rows)),
+        mimetype='application/pdf'
+    )
+    response.headers['Content-Disposition'] = 'attachment; filename="pesquisas_qr.pdf"'
+    return response
@@ -0,0 +1,637 @@
+"""Build fingerprinted, minified and precompressed static bundles.
+
+Usage: python assets.py build [--offline]
+
+Bootstrap and Font Awesome come from pinned PyPI releases (checked against their
+sha256 and unpacked into assets_vendor/). Their CSS is parsed with tinycss2 and
+reduced to the rules the templates, survey.js and SAFELIST can match; rcssmin and
+rjsmin minify the bundles (pip install -r requirements-assets.txt). The build is
+committed in static/dist/ with a manifest that init_assets() reads to point
+url_for('static', ...) at it; when a source changes without a rebuild the
+templates fall back to the CDN links.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import sys
+import tarfile
+import zipfile
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # .br files are skipped and gzip is served instead
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+ASSETS_VENDOR_DIR = os.environ.get("ASSETS_VENDOR_DIR", os.path.join(BASE_DIR, "assets_vendor"))
+ASSETS_ENABLED = os.environ.get("ASSETS_ENABLED", "1") == "1"
+# Fingerprinted files never change, so browsers may keep them for a year
+ASSETS_MAX_AGE = 365 * 24 * 3600
+DIST_DIR = "dist"
+
+# Pinned upstream releases (the versions the templates link from the CDNs):
+# package -> (archive, sha256, directory of the dist files inside the archive)
+VENDOR_PACKAGES = {
+    'bootstrap': (
+        "https://files.pythonhosted.org/packages/69/31/a25c0c4cf367002aaef1998c3f553a0f7b66b4da990969623c9491d681cc/"
+        "xstatic_bootstrap-5.3.8.0.tar.gz",
+        "04f5cc95bbe5438d1e851d06c4ca1ad7f84bd36a09b4de5a1f54b524e8506859",
+        "xstatic_bootstrap-5.3.8.0/xstatic/pkg/bootstrap/data/"
+    ),
+    'fontawesome': (
+        "https://files.pythonhosted.org/packages/da/4f/b7b92cea41e08fde60788ca71d529bd51148bd2ff0389f8233efd92aa18f/"
+        "fontawesomefree-6.4.0-py3-none-any.whl",
+        "e12edad71b6cf6993fc7c6aea6367e131f2f247b6435faca99b12329bacd2b27",
+        "fontawesomefree/static/fontawesomefree/"
+    )
+}
+
+# Upstream's minified bundle, included when a template names a plugin with
+# data-bs-toggle / data-bs-dismiss
+BOOTSTRAP_JS = "vendor:bootstrap/js/bootstrap.bundle.min.js"
+
+# Bundle name -> sources in cascade order ("vendor:" stylesheets are tree-shaken)
+BUNDLES = {
+    'app.css': ['vendor:bootstrap/css/bootstrap.css', 'vendor:fontawesome/css/all.css', 'css/style.css'],
+    'survey.js': [BOOTSTRAP_JS, 'js/survey.js']
+}
+
+# Classes Bootstrap's plugins toggle at run time or the server renders from
+# variables; the scan cannot see them, so their rules are always kept
+SAFELIST = {
+    'active', 'collapse', 'collapsing', 'disabled', 'fade', 'show', 'showing', 'hide',
+    'is-invalid', 'is-valid', 'was-validated', 'invalid-feedback', 'valid-feedback',
+    'alert-dismissible', 'btn-close'
+}
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+
+logger = logging.getLogger(__name__)
+
+
+class AssetError(Exception):
+    """Raised when the static bundles cannot be built"""
+    pass
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_digest(path):
+    try:
+        with open(path, 'rb') as source:
+            return _digest(source.read())
+    except OSError:
+        return None
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'wb') as output:
+        output.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _vendor_archive(package, offline):
+    """Local copy of a pinned release archive, downloaded and verified on first use"""
+    url, sha256, _ = VENDOR_PACKAGES[package]
+    path = os.path.join(ASSETS_VENDOR_DIR, "archives", posixpath.basename(url))
+    if os.path.exists(path):
+        return path
+    if offline:
+        raise AssetError(f"{posixpath.basename(url)} is missing (build without --offline to download it)")
+
+    import requests
+    logger.info(f"Downloading {url}")
+    try:
+        response = requests.get(url, timeout=120)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise AssetError(f"Could not download {url}: {e}")
+    if _digest(response.content) != sha256:
+        raise AssetError(f"{url} does not match its pinned sha256")
+    _write_atomic(path, response.content)
+    return path
+
+
+def vendor_path(name, offline=False):
+    """Local copy of a file ("package/path") from a pinned vendor release"""
+    package, _, relative = name.partition('/')
+    if package not in VENDOR_PACKAGES:
+        raise AssetError(f"Unknown vendor package '{package}'")
+    url, sha256, root = VENDOR_PACKAGES[package]
+    # Keyed by the release, so changing a pin never reuses files of the old one
+    path = os.path.join(ASSETS_VENDOR_DIR, sha256[:12], *name.split('/'))
+    if os.path.exists(path):
+        return path
+
+    archive = _vendor_archive(package, offline)
+    member = root + relative
+    try:
+        if archive.endswith('.whl'):
+            with zipfile.ZipFile(archive) as wheel:
+                data = wheel.read(member)
+        else:
+            with tarfile.open(archive) as sdist:
+                data = sdist.extractfile(member).read()
+    except KeyError:
+        raise AssetError(f"{posixpath.basename(url)} has no {member}")
+    _write_atomic(path, data)
+    return path
+
+
+# --- Usage scan -------------------------------------------------------------
+
+class Usage:
+    """Classes and Bootstrap plugins referenced by the templates and scripts"""
+
+    def __init__(self):
+        self.classes = set(SAFELIST)
+        self.prefixes = set()
+        self.plugins = set()
+
+    def scan_template(self, html):
+        for value in re.findall(r'class="([^"]*)"', html):
+            # alert-{{ category }} keeps every alert-* rule
+            value = re.sub(r'\{%.*?%\}', ' ', re.sub(r'\{\{.*?\}\}', '\0', value))
+            for token in value.split():
+                if '\0' in token:
+                    prefix = token.split('\0')[0]
+                    if prefix:
+                        self.prefixes.add(prefix)
+                else:
+                    self.classes.add(token)
+        self.plugins.update(re.findall(r'data-bs-(?:toggle|dismiss)="(\w+)"', html))
+
+    def scan_script(self, js):
+        # Any word inside a string literal may be a class name (classList.add('x'), innerHTML, ...)
+        for literal in re.findall(r"'[^'\n]*'|\"[^\"\n]*\"|`[^`]*`", js):
+            self.classes.update(re.findall(r'-?[A-Za-z_][\w-]*', literal))
+
+    def uses_class(self, name):
+        return name in self.classes or any(name.startswith(prefix) for prefix in self.prefixes)
+
+    def matches(self, selector):
+        """True when every class the selector requires can appear in our markup"""
+        return all(self.uses_class(name) for name in selector_classes(selector))
+
+
+# --- CSS --------------------------------------------------------------------
+
+_NESTED_AT_RULES = ('media', 'supports', 'container', 'layer', 'document')
+
+
+def selector_classes(selector):
+    """Classes a selector (tinycss2 tokens) requires; those inside :not(), :is() and the like are ignored"""
+    return [token.value for previous, token in zip(selector, selector[1:])
+            if previous.type == 'literal' and previous.value == '.' and token.type == 'ident']
+
+
+def _split_commas(tokens):
+    parts = [[]]
+    for token in tokens:
+        if token.type == 'literal' and token.value == ',':
+            parts.append([])
+        elif token.type != 'comment':
+            parts[-1].append(token)
+    return parts
+
+
+def parse_css(text):
+    """Return (license comments, rules) for a stylesheet
+
+    Rules are ('rule', selectors, content) for style rules, ('block', at-rule,
+    children) for @media and friends and ('at', at-rule, None) for the rest.
+    """
+    import tinycss2
+
+    licenses = []
+    nodes = tinycss2.parse_stylesheet(text, skip_comments=False, skip_whitespace=True)
+    for node in nodes:
+        if node.type == 'comment' and node.value.startswith('!'):
+            licenses.append(f"/*{node.value}*/")
+    return licenses, _parse_rules(nodes)
+
+
+def _parse_rules(nodes):
+    import tinycss2
+
+    rules = []
+    for node in nodes:
+        if node.type == 'error':
+            raise AssetError(f"CSS parse error at line {node.source_line}: {node.message}")
+        if node.type == 'qualified-rule':
+            rules.append(('rule', _split_commas(node.prelude), node.content))
+        elif node.type == 'at-rule' and node.lower_at_keyword == 'charset':
+            continue  # only valid at the very start of a file; the bundle is served as UTF-8
+        elif node.type == 'at-rule' and node.lower_at_keyword in _NESTED_AT_RULES and node.content is not None:
+            children = tinycss2.parse_rule_list(node.content, skip_comments=True, skip_whitespace=True)
+            rules.append(('block', node, _parse_rules(children)))
+        elif node.type == 'at-rule':
+            rules.append(('at', node, None))
+    return rules
+
+
+def shake_css(rules, usage):
+    """Drop selectors that reference classes our markup never uses"""
+    kept = []
+    for kind, node, body in rules:
+        if kind == 'rule':
+            selectors = [selector for selector in node if usage.matches(selector)]
+            if selectors:
+                kept.append((kind, selectors, body))
+        elif kind == 'block':
+            children = shake_css(body, usage)
+            if children:
+                kept.append((kind, node, children))
+        else:
+            kept.append((kind, node, body))
+    return kept
+
+
+def _rule_text(rules):
+    """Declarations of every style rule (what @font-face and @keyframes must be referenced from)"""
+    import tinycss2
+
+    text = []
+    for kind, node, body in rules:
+        if kind == 'block':
+            text.append(_rule_text(body))
+        elif kind == 'rule':
+            text.append(tinycss2.serialize(body))
+    return '\n'.join(text)
+
+
+def _font_family(node):
+    import tinycss2
+
+    for declaration in tinycss2.parse_blocks_contents(node.content, skip_comments=True, skip_whitespace=True):
+        if declaration.type == 'declaration' and declaration.lower_name == 'font-family':
+            return tinycss2.serialize(declaration.value).strip().strip('"\'')
+    return None
+
+
+def drop_unreferenced(rules, used_text):
+    """Drop @font-face and @keyframes that no remaining rule refers to"""
+    import tinycss2
+
+    kept = []
+    for kind, node, body in rules:
+        if kind == 'block':
+            body = drop_unreferenced(body, used_text)
+            if not body:
+                continue
+        elif kind == 'at' and node.lower_at_keyword in ('keyframes', '-webkit-keyframes'):
+            name = tinycss2.serialize(node.prelude).strip()
+            if not re.search(r'(?<![\w-])%s(?![\w-])' % re.escape(name), used_text):
+                continue
+        elif kind == 'at' and node.lower_at_keyword == 'font-face':
+            family = _font_family(node)
+            if family and family not in used_text:
+                continue
+        kept.append((kind, node, body))
+    return kept
+
+
+def _rewrite_urls(tokens, rewrite_url):
+    from tinycss2.ast import URLToken
+    from tinycss2.serializer import serialize_url
+
+    out = []
+    for token in tokens:
+        reference = None
+        if token.type == 'url':
+            reference = token.value
+        elif token.type == 'function' and token.lower_name == 'url' and \
+                [argument.type for argument in token.arguments if argument.type != 'whitespace'] == ['string']:
+            reference = next(argument.value for argument in token.arguments if argument.type == 'string')
+        elif token.type in ('function', '() block', '[] block', '{} block'):
+            attribute = 'arguments' if token.type == 'function' else 'content'
+            setattr(token, attribute, _rewrite_urls(getattr(token, attribute), rewrite_url))
+        if reference is not None:
+            target = rewrite_url(reference)
+            token = URLToken(token.source_line, token.source_column, target, f"url({serialize_url(target)})")
+        out.append(token)
+    return out
+
+
+def _woff2_only(node):
+    """@font-face declarations keeping only the woff2 sources (every browser we serve supports them)"""
+    import tinycss2
+
+    declarations = []
+    for declaration in tinycss2.parse_blocks_contents(node.content, skip_comments=True, skip_whitespace=True):
+        if declaration.type != 'declaration':
+            continue
+        values = [tinycss2.serialize(value).strip() for value in _split_commas(declaration.value)]
+        if declaration.lower_name == 'src' and any('woff2' in value for value in values):
+            values = [value for value in values if 'woff2' in value]
+        declarations.append(f"{declaration.name}:{','.join(values)}{'!important' if declaration.important else ''}")
+    return ';'.join(declarations)
+
+
+def serialize_css(rules, rewrite_url):
+    import tinycss2
+
+    out = []
+    for kind, node, body in rules:
+        if kind == 'rule':
+            selectors = ','.join(tinycss2.serialize(selector).strip() for selector in node)
+            out.append(f"{selectors}{{{tinycss2.serialize(_rewrite_urls(body, rewrite_url))}}}")
+        elif kind == 'block':
+            out.append(f"@{node.at_keyword}{tinycss2.serialize(node.prelude)}{{{serialize_css(body, rewrite_url)}}}")
+        elif node.content is None:
+            out.append(f"@{node.at_keyword}{tinycss2.serialize(node.prelude)};")
+        else:
+            if node.lower_at_keyword == 'font-face':
+                node.content = tinycss2.parse_component_value_list(_woff2_only(node))
+            content = tinycss2.serialize(_rewrite_urls(node.content, rewrite_url))
+            out.append(f"@{node.at_keyword}{tinycss2.serialize(node.prelude)}{{{content}}}")
+    return '\n'.join(out)
+
+
+# --- Build --------------------------------------------------------------------
+
+class _Output:
+    """Fingerprinted files written to the dist directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.paths = {}
+        self.sizes = {}
+
+    def write(self, logical, data):
+        """Write data as <logical stem>.<hash><ext>; returns its path relative to static/"""
+        if logical in self.paths:
+            return self.paths[logical]
+        stem, extension = posixpath.splitext(logical)
+        name = f"{stem}.{_digest(data)[:10]}{extension}"
+        target = os.path.join(self.directory, *name.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as output:
+            output.write(data)
+
+        encodings = []
+        if extension in COMPRESSIBLE:
+            with open(target + '.gz', 'wb') as output:
+                output.write(gzip.compress(data, 9, mtime=0))
+            encodings.append('gzip')
+            if brotli is not None:
+                with open(target + '.br', 'wb') as output:
+                    output.write(brotli.compress(data, quality=11))
+                encodings.append('br')
+
+        path = f"{DIST_DIR}/{name}"
+        self.paths[logical] = path
+        self.sizes[path] = (len(data), encodings)
+        return path
+
+
+def _read_source(source, static_dir, offline):
+    if source.startswith('vendor:'):
+        name = source[len('vendor:'):]
+        return 'vendor', name, vendor_path(name, offline)
+    return 'static', source, os.path.join(static_dir, *source.split('/'))
+
+
+def _css_bundle(sources, usage, output, static_dir, offline, bundle_dir):
+    from rcssmin import cssmin
+
+    pieces = []
+    for source in sources:
+        origin, name, path = _read_source(source, static_dir, offline)
+        with open(path, encoding='utf-8') as css_file:
+            licenses, rules = parse_css(css_file.read())
+        if origin == 'vendor':
+            rules = shake_css(rules, usage)
+            rules = drop_unreferenced(rules, _rule_text(rules))
+
+        def rewrite_url(reference, origin=origin, name=name):
+            if re.match(r'(?:[a-z]+:|//|/|#)', reference):
+                return reference
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(name), reference.split('?')[0].split('#')[0]))
+            if origin == 'vendor':
+                local, logical = vendor_path(resolved, offline), f"vendor/{resolved}"
+            else:
+                local, logical = os.path.join(static_dir, *resolved.split('/')), resolved
+            with open(local, 'rb') as referenced:
+                target = output.write(logical, referenced.read())
+            return posixpath.relpath(target, bundle_dir)
+
+        pieces.append('\n'.join(licenses + [cssmin(serialize_css(rules, rewrite_url))]))
+    return '\n'.join(pieces) + '\n'
+
+
+def _js_bundle(sources, usage, static_dir, offline):
+    from rjsmin import jsmin
+
+    pieces = []
+    for source in sources:
+        if source == BOOTSTRAP_JS and not usage.plugins:
+            continue
+        origin, _, path = _read_source(source, static_dir, offline)
+        with open(path, encoding='utf-8') as js_file:
+            code = js_file.read()
+        if origin == 'vendor':
+            # Already minified upstream; its source map is not shipped
+            code = re.sub(r'\n//# sourceMappingURL=\S+\s*$', '', code)
+        else:
+            code = jsmin(code, keep_bang_comments=True)
+        pieces.append(code.strip() + ';\n')
+    return ''.join(pieces)
+
+
+def _build_sources(static_dir):
+    """Local files a build depends on, relative to the project root"""
+    sources = [posixpath.join('templates', name) for name in sorted(os.listdir(TEMPLATES_DIR)) if name.endswith('.html')]
+    for bundle_sources in BUNDLES.values():
+        sources.extend(posixpath.join('static', source) for source in bundle_sources if not source.startswith('vendor:'))
+    return sources
+
+
+def _build_config():
+    """Digest of the pins and settings a build was made with"""
+    return _digest(json.dumps([VENDOR_PACKAGES, BUNDLES, sorted(SAFELIST)], sort_keys=True).encode('utf-8'))[:12]
+
+
+def scan_usage(static_dir=STATIC_DIR):
+    """Classes and plugins the templates and our scripts reference"""
+    usage = Usage()
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(TEMPLATES_DIR, name), encoding='utf-8') as template:
+                usage.scan_template(template.read())
+    for sources in BUNDLES.values():
+        for source in sources:
+            if source.endswith('.js') and not source.startswith('vendor:'):
+                with open(os.path.join(static_dir, *source.split('/')), encoding='utf-8') as js_file:
+                    usage.scan_script(js_file.read())
+    return usage
+
+
+def build(static_dir=STATIC_DIR, offline=False):
+    """Build every bundle into static/dist and write its manifest; returns the manifest"""
+    usage = scan_usage(static_dir)
+
+    dist = os.path.join(static_dir, DIST_DIR)
+    staging = dist + ".new"
+    shutil.rmtree(staging, ignore_errors=True)
+    output = _Output(staging)
+    files = {}
+
+    for bundle, sources in BUNDLES.items():
+        bundle_dir = f"{DIST_DIR}/{bundle.rsplit('.', 1)[1]}"
+        if bundle.endswith('.css'):
+            data = _css_bundle(sources, usage, output, static_dir, offline, bundle_dir)
+        else:
+            data = _js_bundle(sources, usage, static_dir, offline)
+        files[bundle] = output.write(f"{bundle_dir[len(DIST_DIR) + 1:]}/{bundle}", data.encode('utf-8'))
+
+    # Images the templates link directly
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(TEMPLATES_DIR, name), encoding='utf-8') as template:
+                html = template.read()
+            for filename in re.findall(r"url_for\('static', filename='([^']+)'\)", html):
+                path = os.path.join(static_dir, *filename.split('/'))
+                bundled = filename in BUNDLES or any(filename in sources for sources in BUNDLES.values())
+                if not bundled and os.path.isfile(path):
+                    with open(path, 'rb') as static_file:
+                        files[filename] = output.write(filename, static_file.read())
+
+    manifest = {
+        'version': _digest(json.dumps(sorted(output.sizes)).encode('utf-8'))[:12],
+        'config': _build_config(),
+        'sources': {source: _file_digest(os.path.join(BASE_DIR, *source.split('/'))) for source in _build_sources(static_dir)},
+        'files': files,
+        'immutable': {path: encodings for path, (_, encodings) in output.sizes.items()}
+    }
+    with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        manifest_file.write('\n')
+
+    shutil.rmtree(dist, ignore_errors=True)
+    os.replace(staging, dist)
+    return manifest
+
+
+# --- Serving --------------------------------------------------------------------
+
+_manifest = None
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """The build manifest, or None when there is no build or it is older than its sources"""
+    if not ASSETS_ENABLED:
+        return None
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, 'manifest.json'), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable static asset manifest: {e}")
+        return None
+
+    stale = [source for source, digest in manifest['sources'].items()
+             if _file_digest(os.path.join(BASE_DIR, *source.split('/'))) != digest]
+    if manifest.get('config') != _build_config():
+        stale.append('the vendor pins in assets.py')
+    if stale:
+        logger.warning(f"Static bundles are older than {', '.join(stale)}; serving CDN assets "
+                       f"until `python assets.py build` is run again")
+        return None
+    return manifest
+
+
+def get_asset_version():
+    """Identifies the current bundles ('' when the CDN assets are used)"""
+    return _manifest['version'] if _manifest else ''
+
+
+def init_assets(app):
+    """Serve the built bundles through url_for('static', ...) with immutable caching"""
+    global _manifest
+    _manifest = load_manifest(app.static_folder)
+    app.jinja_env.globals['asset_bundles'] = _manifest is not None
+    if _manifest is None:
+        logger.info("Static bundles not built; templates use the CDN assets")
+        return
+
+    files = _manifest['files']
+    immutable = _manifest['immutable']
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in files:
+            values['filename'] = files[values['filename']]
+
+    serve_static = app.view_functions['static']
+
+    def static(filename):
+        if filename not in immutable:
+            return serve_static(filename=filename)
+
+        # Precompressed variant when the client accepts it
+        encoding, served = None, filename
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in immutable[filename] and request.accept_encodings[candidate]:
+                encoding, served = candidate, filename + suffix
+                break
+
+        response = send_from_directory(app.static_folder, served, mimetype=mimetypes.guess_type(filename)[0],
+                                       max_age=ASSETS_MAX_AGE)
+        if encoding:
+            response.content_encoding = encoding
+        if immutable[filename]:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+    logger.info(f"Serving static bundles {_manifest['version']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="build static/dist and its manifest")
+    build_parser.add_argument("--offline", action="store_true", help="fail instead of downloading vendor releases")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        manifest = build(offline=args.offline)
+    except ImportError as e:
+        logger.error(f"Static asset build needs its tools (pip install -r requirements-assets.txt): {e}")
+        return 1
+    except (AssetError, OSError) as e:
+        logger.error(f"Static asset build failed: {e}")
+        return 1
+
+    for path, encodings in sorted(manifest['immutable'].items()):
+        full_path = os.path.join(STATIC_DIR, *path.split('/'))
+        sizes = [f"{os.path.getsize(full_path) / 1024:.1f} KiB"]
+        sizes += [f"{encoding} {os.path.getsize(full_path + ('.br' if encoding == 'br' else '.gz')) / 1024:.1f} KiB"
+                  for encoding in encodings]
+        print(f"{path}  {'  '.join(sizes)}")
+    if brotli is None:
+        print("brotli is not installed: only gzip variants were written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
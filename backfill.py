@@ -0,0 +1,233 @@
+"""Create surveys for every item of a Monday.com board in one pass.
+
+Usage: python backfill.py [--board-id ID] [--resume] [--artifacts [--base-url URL]]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from database import init_database, save_survey
+from jobs import task
+from monday_client import get_client, BOARD_ID
+from monday_columns import build_survey_data, survey_extractor
+
+# Monday.com returns at most 100 items per items(ids: ...) call and 500 per items_page
+MONDAY_ITEMS_LIMIT = 100
+BACKFILL_BATCH_SIZE = int(os.environ.get("BACKFILL_BATCH_SIZE", str(MONDAY_ITEMS_LIMIT)))
+# Resume cursors, one file per board
+BACKFILL_STATE_DIR = os.environ.get("BACKFILL_STATE_DIR", tempfile.gettempdir())
+
+logger = logging.getLogger(__name__)
+
+ITEM_FIELDS = f"""
+                id
+                name
+                {survey_extractor.graphql_selection()}
+"""
+
+FIRST_PAGE_QUERY = f"""
+query($boardId: [ID!], $limit: Int!) {{
+    boards(ids: $boardId) {{
+        items_page(limit: $limit) {{
+            cursor
+            items {{{ITEM_FIELDS}            }}
+        }}
+    }}
+}}
+"""
+
+NEXT_PAGE_QUERY = f"""
+query($cursor: String!, $limit: Int!) {{
+    next_items_page(cursor: $cursor, limit: $limit) {{
+        cursor
+        items {{{ITEM_FIELDS}        }}
+    }}
+}}
+"""
+
+ITEMS_QUERY = f"""
+query($itemIds: [ID!], $limit: Int!) {{
+    items(ids: $itemIds, limit: $limit) {{{ITEM_FIELDS}    }}
+}}
+"""
+
+
+class BackfillError(Exception):
+    pass
+
+
+def _check(result):
+    if 'errors' in result:
+        raise BackfillError(f"GraphQL error: {result['errors']}")
+    return result.get('data') or {}
+
+
+def get_items_data(item_ids):
+    """Fetch survey columns for many items, MONDAY_ITEMS_LIMIT IDs per request"""
+    items = []
+    item_ids = [str(item_id) for item_id in item_ids]
+    for start in range(0, len(item_ids), MONDAY_ITEMS_LIMIT):
+        batch = item_ids[start:start + MONDAY_ITEMS_LIMIT]
+        data = _check(get_client().execute(ITEMS_QUERY, {"itemIds": batch, "limit": len(batch)}))
+        items.extend(data.get('items') or [])
+    return items
+
+
+def iter_board_pages(board_id, batch_size=BACKFILL_BATCH_SIZE, cursor=None):
+    """Yield (items, next_cursor) for each items_page of a board, starting at cursor if given"""
+    client = get_client()
+    if cursor is None:
+        data = _check(client.execute(FIRST_PAGE_QUERY, {"boardId": [str(board_id)], "limit": batch_size}))
+        boards = data.get('boards') or []
+        if not boards:
+            raise BackfillError(f"Board {board_id} not found")
+        page = boards[0]['items_page']
+    else:
+        # Cursors expire 60 minutes after the first page was requested
+        page = _check(client.execute(NEXT_PAGE_QUERY, {"cursor": cursor, "limit": batch_size}))['next_items_page']
+
+    while True:
+        yield page.get('items') or [], page.get('cursor')
+        if not page.get('cursor'):
+            return
+        page = _check(client.execute(NEXT_PAGE_QUERY, {"cursor": page['cursor'], "limit": batch_size}))['next_items_page']
+
+
+def state_path(board_id):
+    """Cursor file of a board's backfill"""
+    return os.path.join(BACKFILL_STATE_DIR, f"avaliacao_backfill_{board_id}.json")
+
+
+def _load_state(path):
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_state(path, state):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(temp_path, path)
+
+
+def _save_items(items, artifacts, base_url):
+    if artifacts:
+        # Registers the survey_artifacts task
+        from artifact_jobs import queue_survey_artifacts
+        from routes import survey_link
+    for item in items:
+        survey_data = build_survey_data(item['id'], item.get('name', 'Unknown Trip'), item.get('column_values', []))
+        save_survey(survey_data['survey_id'], survey_data)
+        if artifacts:
+            # Same link and artifact key as the webhook, so unchanged surveys are not regenerated
+            queue_survey_artifacts(survey_data, survey_link(survey_data['survey_id'], base_url=base_url))
+
+
+def run_backfill(board_id=BOARD_ID, batch_size=BACKFILL_BATCH_SIZE, resume=False, item_ids=None,
+                 artifacts=False, base_url=None, state_file=None, progress=None):
+    """Create surveys for a whole board (or a list of item IDs) and report throughput
+
+    progress(processed, cursor) is called after every saved batch.
+    """
+    if artifacts:
+        from routes import SURVEY_BASE_URL
+        base_url = base_url or SURVEY_BASE_URL
+        if not base_url:
+            raise ValueError("base_url (or SURVEY_BASE_URL) is required to queue artifacts")
+    batch_size = max(1, min(batch_size, MONDAY_ITEMS_LIMIT))
+    state_file = state_file or state_path(board_id)
+
+    client = get_client()
+    complexity_before = client.budget.total_used
+    started = time.monotonic()
+    processed = 0
+    cursor = None
+
+    if item_ids:
+        for start in range(0, len(item_ids), batch_size):
+            items = get_items_data(item_ids[start:start + batch_size])
+            _save_items(items, artifacts, base_url)
+            processed += len(items)
+            if progress:
+                progress(processed, None)
+    else:
+        state = _load_state(state_file) if resume else None
+        if state and str(state.get('board_id')) == str(board_id) and state.get('cursor'):
+            cursor = state['cursor']
+            processed = state.get('processed', 0)
+            logger.info(f"Resuming backfill of board {board_id} after {processed} items")
+
+        for items, cursor in iter_board_pages(board_id, batch_size, cursor):
+            _save_items(items, artifacts, base_url)
+            processed += len(items)
+            # Persist the cursor after every page so an interrupted run can resume
+            _save_state(state_file, {
+                'board_id': str(board_id),
+                'cursor': cursor,
+                'processed': processed,
+                'updated_at': datetime.now().isoformat()
+            })
+            logger.info(f"Backfill: {processed} items saved")
+            if progress:
+                progress(processed, cursor)
+
+    elapsed = time.monotonic() - started
+    complexity_used = client.budget.total_used - complexity_before
+    return {
+        'board_id': str(board_id),
+        'items': processed,
+        'seconds': round(elapsed, 2),
+        'items_per_second': round(processed / elapsed, 1) if elapsed > 0 else None,
+        'complexity_used': complexity_used,
+        'complexity_remaining': client.budget.remaining,
+        'complete': cursor is None
+    }
+
+
+@task('board_backfill')
+def board_backfill_job(job):
+    """Background job wrapper for run_backfill
+
+    Retries continue from the board's saved cursor, and every page refreshes
+    the job row so stale-job recovery does not start a second run.
+    """
+    payload = dict(job.payload)
+    if job.attempts > 1:
+        payload['resume'] = True
+    return run_backfill(**payload, progress=lambda processed, cursor: job.mark_step('progress', {
+        'processed': processed, 'cursor': cursor}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--board-id", default=BOARD_ID)
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--resume", action="store_true", help="continue from the last saved cursor")
+    parser.add_argument("--ids", help="comma-separated item IDs instead of the whole board")
+    parser.add_argument("--artifacts", action="store_true", help="queue PDF/PNG generation for each survey")
+    parser.add_argument("--base-url", help="public URL of the survey pages (default: SURVEY_BASE_URL)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.artifacts:
+        from jobs import drain
+
+    init_database()
+    item_ids = [item_id.strip() for item_id in args.ids.split(',') if item_id.strip()] if args.ids else None
+    summary = run_backfill(args.board_id, args.batch_size, args.resume, item_ids, args.artifacts, args.base_url)
+    if args.artifacts:
+        drain()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
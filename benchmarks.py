@@ -0,0 +1,386 @@
+"""Performance benchmarks for the survey service.
+
+Run `python benchmarks.py <name> --help` for the options of each benchmark.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+# Cold start of the serverless entry point (`import app` plus the first survey page), median over runs
+COLD_START_BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", "250"))
+# Heavy libraries a survey page must not load (PDF, image and Monday.com work only)
+COLD_START_DEFERRED = ('reportlab', 'qrcode', 'PIL', 'requests')
+
+# Run in a fresh interpreter: import the entry point, then serve one stored survey page
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+from database import save_survey
+from monday_columns import build_survey_data
+survey = build_survey_data('1', 'Cold start', [])
+save_survey(survey['survey_id'], survey)
+client = {module}.app.test_client()
+before = time.perf_counter()
+response = client.get('/survey/' + survey['survey_id'])
+done = time.perf_counter()
+print(json.dumps({{
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'request_ms': (done - before) * 1000,
+    'modules': sorted({{name.split('.')[0] for name in sys.modules}})
+}}))
+"""
+
+
+def _report(title, rows):
+    """Print a small aligned table"""
+    print(f"\n{title}")
+    print("-" * len(title))
+    width = max(len(str(key)) for key, _ in rows)
+    for key, value in rows:
+        print(f"{str(key).ljust(width)}  {value}")
+
+
+def bench_reconstruct_burst(args):
+    """Burst of concurrent lookups for one uncached survey: upstream calls should stay at 1"""
+    import multiprocessing
+
+    workdir = tempfile.mkdtemp(prefix="bench_singleflight_")
+    os.environ["SURVEYS_DB_PATH"] = os.path.join(workdir, "surveys.sqlite3")
+    os.environ["SINGLEFLIGHT_LOCK_DIR"] = os.path.join(workdir, "locks")
+    import database
+
+    upstream_calls = multiprocessing.Value('i', 0)
+
+    def loader():
+        with upstream_calls.get_lock():
+            upstream_calls.value += 1
+        time.sleep(args.latency)
+        return {'survey_id': args.survey_id, 'trip_name': 'Benchmark'}
+
+    def burst():
+        latencies = []
+        barrier = threading.Barrier(args.requests)
+
+        def request():
+            barrier.wait()
+            started = time.perf_counter()
+            survey = database.lookup_survey(args.survey_id, loader)
+            latencies.append(time.perf_counter() - started)
+            assert survey is not None
+
+        threads = [threading.Thread(target=request) for _ in range(args.requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies
+
+    database.init_database()
+    if args.processes > 1:
+        ctx = multiprocessing.get_context('fork')
+        workers = [ctx.Process(target=burst) for _ in range(args.processes)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        latencies = []
+    else:
+        started = time.perf_counter()
+        latencies = burst()
+        elapsed = time.perf_counter() - started
+
+    rows = [
+        ("processes", args.processes),
+        ("concurrent requests per process", args.requests),
+        ("upstream latency (s)", args.latency),
+        ("upstream calls", upstream_calls.value),
+        ("wall time (s)", f"{elapsed:.3f}"),
+    ]
+    if latencies:
+        rows.append(("median request latency (s)", f"{statistics.median(latencies):.3f}"))
+        rows.append(("coalescing", database.get_cache_stats()['single_flight']))
+    _report("Single-flight survey reconstruction", rows)
+    return 0 if upstream_calls.value == 1 else 1
+
+
+SAMPLE_SURVEY = {
+    'survey_id': '9876543210',
+    'company_name': 'Empresa Exemplo Ltda',
+    'location': 'Gramado - RS',
+    'date': 'Maio de 2025',
+    'trip_name': 'Convenção de Vendas 2025'
+}
+SAMPLE_URL = "https://avaliacaotop.vercel.app/survey/9876543210"
+
+
+def _measure(func, runs, memory=True):
+    """Median latency (ms) and median tracemalloc peak (KiB, None unless memory) of func over runs
+
+    Latency and memory come from separate passes: tracing allocations slows
+    Python-heavy code far more than code that spends its time in C.
+    """
+    import tracemalloc
+
+    func()  # warm-up (imports, font metrics)
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    if not memory:
+        return statistics.median(latencies), None
+
+    peaks = []
+    for _ in range(runs):
+        tracemalloc.start()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return statistics.median(latencies), statistics.median(peaks)
+
+
+def bench_pdf_render(args):
+    """Per-render latency and allocations with per-call vs process-wide PDF resources"""
+    import pdf_generator
+
+    def per_call():
+        # What every render used to do: rebuild styles and decode the logo
+        pdf_generator.SurveyPDFTemplate().render(SAMPLE_SURVEY, SAMPLE_URL)
+
+    def shared():
+        pdf_generator.get_pdf_template().render(SAMPLE_SURVEY, SAMPLE_URL)
+
+    before_ms, before_kib = _measure(per_call, args.runs)
+    after_ms, after_kib = _measure(shared, args.runs)
+    _report("PDF render (median of %d runs)" % args.runs, [
+        ("per-call resources", f"{before_ms:7.1f} ms  peak {before_kib:8.0f} KiB"),
+        ("shared template", f"{after_ms:7.1f} ms  peak {after_kib:8.0f} KiB"),
+        ("speed-up", f"{before_ms / after_ms:.1f}x"),
+    ])
+    return 0
+
+
+def bench_pdf_qr(args):
+    """QR code as an embedded PNG vs vector rectangles: PDF size and render latency"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Image
+    import pdf_generator
+
+    def build(flowable):
+        buffer = BytesIO()
+        SimpleDocTemplate(buffer, pagesize=A4).build([flowable])
+        return buffer.getvalue()
+
+    def raster():
+        return build(Image(pdf_generator.generate_qr_code(SAMPLE_URL), width=3*inch, height=3*inch))
+
+    def vector():
+        return build(pdf_generator.VectorQRCode(SAMPLE_URL, 3*inch))
+
+    raster_bytes, vector_bytes = len(raster()), len(vector())
+    raster_ms, _ = _measure(raster, args.runs, memory=False)
+    vector_ms, _ = _measure(vector, args.runs, memory=False)
+    _report("QR code in PDF (median of %d runs)" % args.runs, [
+        ("PNG image", f"{raster_ms:7.1f} ms  {raster_bytes:7d} bytes"),
+        ("vector runs", f"{vector_ms:7.1f} ms  {vector_bytes:7d} bytes"),
+        ("speed-up", f"{raster_ms / vector_ms:.1f}x"),
+    ])
+    # Timings vary with the machine; the size comparison is covered by tests/test_pdf_qr.py
+    return 0
+
+
+def _png_render_worker(cached, runs, results):
+    """Child process body for bench_png_render (fresh process so peak RSS is per mode)"""
+    import resource
+    import image_generator
+
+    def render():
+        if not cached:
+            image_generator._background = None  # decode and scale the background every time
+        image_generator.create_survey_image(SAMPLE_SURVEY, SAMPLE_URL)
+
+    latency_ms, _ = _measure(render, runs, memory=False)
+    results.put((latency_ms, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def bench_png_render(args):
+    """Survey PNG latency and peak RSS with and without the cached background"""
+    import multiprocessing
+
+    ctx = multiprocessing.get_context('spawn')
+    rows = []
+    for label, cached in (("background per render", False), ("cached background", True)):
+        results = ctx.Queue()
+        worker = ctx.Process(target=_png_render_worker, args=(cached, args.runs, results))
+        worker.start()
+        latency_ms, peak_mib = results.get()
+        worker.join()
+        rows.append((label, f"{latency_ms:7.1f} ms  peak RSS {peak_mib:6.1f} MiB"))
+    _report("Survey PNG render (median of %d runs)" % args.runs, rows)
+    return 0
+
+
+def bench_image_encode(args):
+    """Encode time and output size of the survey image for each output profile"""
+    from PIL import Image
+    import image_generator
+
+    # Rebuild the composited image once, then time only the encoders
+    rendered = image_generator.create_survey_image(SAMPLE_SURVEY, SAMPLE_URL, 'png-fast')
+    with Image.open(BytesIO(rendered)) as source:
+        img = source.copy()
+
+    rows = []
+    for name, profile in image_generator.IMAGE_PROFILES.items():
+        size = len(image_generator.encode_image(img, profile))
+        encode_ms, _ = _measure(lambda: image_generator.encode_image(img, profile), args.runs, memory=False)
+        rows.append((name, f"{encode_ms:7.1f} ms  {size / 1024:7.1f} KiB  {profile.content_type}"))
+    _report("Survey image encode (median of %d runs)" % args.runs, rows)
+    return 0
+
+
+def _import_times(stderr, entry):
+    """[(module, self_us, cumulative_us)] imported by entry, from -X importtime output (entry last)"""
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        lines.append((name.strip(), name.startswith("  "), int(self_us), int(cumulative_us)))
+
+    # Children are reported before their parent, so the entry's subtree ends at its own line
+    end = max(i for i, (name, nested, _, _) in enumerate(lines) if name == entry and not nested)
+    start = end
+    while start > 0 and lines[start - 1][1]:
+        start -= 1
+    return [(name, self_us, cumulative) for name, _, self_us, cumulative in lines[start:end + 1]]
+
+
+def run_cold_start(module="app", importtime=False):
+    """Import module and serve one survey page in a fresh interpreter with throwaway storage
+
+    Returns the script's report (status, import_ms, request_ms, modules), plus
+    the `-X importtime` output as 'importtime' when asked for.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="bench_coldstart_")
+    env = dict(os.environ)
+    env.update({
+        "SURVEYS_DB_PATH": os.path.join(workdir, "surveys.sqlite3"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "ARTIFACT_CACHE_DIR": os.path.join(workdir, "artifacts"),
+        "DERIVATIVES_DIR": os.path.join(workdir, "derivatives"),
+        "SUBMISSIONS_BACKGROUND": "0",
+        "JOB_WORKERS": "0",
+        # Nothing on this path may call Monday.com; fail fast if it does
+        "MONDAY_API_URL": "http://127.0.0.1:9/v2",
+        "LOG_LEVEL": "WARNING"
+    })
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", COLD_START_SCRIPT.format(module=module)]
+    result = subprocess.run(command, cwd=root, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"cold start of {module} failed:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    if importtime:
+        report['importtime'] = result.stderr
+    return report
+
+
+def bench_import_time(args):
+    """Cold start of the serverless entry point (import + first survey page), checked against the budget"""
+    runs = []
+    for _ in range(args.runs + 1):  # the first run only warms the bytecode cache
+        try:
+            cold_start = run_cold_start(args.module, importtime=True)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        if cold_start['status'] != 200:
+            print(f"FAIL: first survey page answered HTTP {cold_start['status']}", file=sys.stderr)
+            return 1
+        cold_start['import_tree'] = _import_times(cold_start.pop('importtime'), args.module)
+        runs.append(cold_start)
+    runs = sorted(runs[1:], key=lambda run: run['import_ms'] + run['request_ms'])
+
+    # Interpreter start-up (site, encodings) is not counted: only the entry point and the first request
+    run = runs[len(runs) // 2]
+    total_ms = run['import_ms'] + run['request_ms']
+    slowest = sorted(run['import_tree'], key=lambda module: module[2], reverse=True)[:args.top]
+    _report(f"Import time of '{args.module}' (median of {args.runs} runs)", [
+        (name, f"{cumulative / 1000:7.1f} ms  (self {self_us / 1000:.1f} ms)")
+        for name, self_us, cumulative in slowest
+    ])
+
+    # Loaded by the import or by the first page, directly or through any dependency
+    eager = [name for name in COLD_START_DEFERRED if name in run['modules']]
+    _report("Cold-start budget", [
+        (f"import {args.module}", f"{run['import_ms']:.1f} ms"),
+        ("first GET /survey/<id>", f"{run['request_ms']:.1f} ms"),
+        ("total", f"{total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)"),
+        ("loaded after first page", ", ".join(eager) or "none"),
+    ])
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"\nFAIL: cold start {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if eager:
+        print(f"\nFAIL: {', '.join(eager)} must not be imported to serve a survey page")
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    burst = subparsers.add_parser("reconstruct-burst", help=bench_reconstruct_burst.__doc__)
+    burst.add_argument("--requests", type=int, default=50)
+    burst.add_argument("--processes", type=int, default=1)
+    burst.add_argument("--latency", type=float, default=0.3, help="simulated Monday.com latency")
+    burst.add_argument("--survey-id", default="123456789")
+    burst.set_defaults(func=bench_reconstruct_burst)
+
+    pdf_render = subparsers.add_parser("pdf-render", help=bench_pdf_render.__doc__)
+    pdf_render.add_argument("--runs", type=int, default=20)
+    pdf_render.set_defaults(func=bench_pdf_render)
+
+    pdf_qr = subparsers.add_parser("pdf-qr", help=bench_pdf_qr.__doc__)
+    pdf_qr.add_argument("--runs", type=int, default=20)
+    pdf_qr.set_defaults(func=bench_pdf_qr)
+
+    png_render = subparsers.add_parser("png-render", help=bench_png_render.__doc__)
+    png_render.add_argument("--runs", type=int, default=10)
+    png_render.set_defaults(func=bench_png_render)
+
+    image_encode = subparsers.add_parser("image-encode", help=bench_image_encode.__doc__)
+    image_encode.add_argument("--runs", type=int, default=5)
+    image_encode.set_defaults(func=bench_image_encode)
+
+    import_time = subparsers.add_parser("import-time", help=bench_import_time.__doc__)
+    import_time.add_argument("--runs", type=int, default=5)
+    import_time.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    import_time.add_argument("--module", default="app", help="entry point to import")
+    import_time.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    import_time.set_defaults(func=bench_import_time)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import threading
+
+
+class Counters:
+    """Named counters shared by request threads, reported on /metrics"""
+
+    def __init__(self, *names):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(names, 0)
+
+    def increment(self, name):
+        """Add one to a counter and return its new value"""
+        with self._lock:
+            self._values[name] += 1
+            return self._values[name]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
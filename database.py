@@ -1,85 +1,613 @@
-
 import json
+import logging
 import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 
-# In-memory storage for temporary data
-surveys_storage = {}
-submission_counts = {}
+from singleflight import SingleFlight, file_lock
+
+# Storage configuration
+# DATABASE_URL selects the backend: postgres://... uses Postgres, anything else SQLite
+DATABASE_URL = os.environ.get("DATABASE_URL", "")
+SURVEYS_DB_PATH = os.environ.get("SURVEYS_DB_PATH", os.path.join(tempfile.gettempdir(), "avaliacao_surveys.sqlite3"))
+POSTGRES_POOL_SIZE = int(os.environ.get("POSTGRES_POOL_SIZE", "5"))
+
+# Survey cache configuration
+SURVEY_CACHE_SIZE = int(os.environ.get("SURVEY_CACHE_SIZE", "1024"))
+SURVEY_CACHE_TTL = float(os.environ.get("SURVEY_CACHE_TTL", "900"))
+SURVEY_NEGATIVE_TTL = float(os.environ.get("SURVEY_NEGATIVE_TTL", "60"))
+
+logger = logging.getLogger(__name__)
+
+# Statements shared by the SQL backends; {0}, {1}, ... are replaced by each backend's placeholders
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS surveys (
+        survey_id TEXT PRIMARY KEY,
+        survey_data TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        submission_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_surveys_created_at ON surveys (created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS webhook_events (
+        event_key TEXT PRIMARY KEY,
+        received_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_webhook_events_received_at ON webhook_events (received_at)",
+    """
+    CREATE TABLE IF NOT EXISTS submissions (
+        id TEXT PRIMARY KEY,
+        survey_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DOUBLE PRECISION NOT NULL,
+        lease_until DOUBLE PRECISION NOT NULL DEFAULT 0,
+        item_id TEXT,
+        error TEXT,
+        created_at DOUBLE PRECISION NOT NULL,
+        updated_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_submissions_pending ON submissions (status, next_attempt_at)",
+    """
+    CREATE TABLE IF NOT EXISTS rate_buckets (
+        bucket_key TEXT PRIMARY KEY,
+        tokens DOUBLE PRECISION NOT NULL,
+        updated_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS submission_fingerprints (
+        fingerprint TEXT PRIMARY KEY,
+        received_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS survey_artifacts (
+        survey_id TEXT PRIMARY KEY,
+        artifact_key TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+]
+
+STATEMENTS = {
+    'save_survey': (
+        "INSERT INTO surveys (survey_id, survey_data, created_at, updated_at) VALUES ({0}, {1}, {2}, {2}) "
+        "ON CONFLICT (survey_id) DO UPDATE SET survey_data = excluded.survey_data, updated_at = excluded.updated_at"
+    ),
+    'import_survey': (
+        "INSERT INTO surveys (survey_id, survey_data, created_at, updated_at) VALUES ({0}, {1}, {2}, {2}) "
+        "ON CONFLICT (survey_id) DO NOTHING"
+    ),
+    'get_survey': "SELECT survey_data, created_at, submission_count FROM surveys WHERE survey_id = {0}",
+    'increment_submission_count': "UPDATE surveys SET submission_count = submission_count + 1 WHERE survey_id = {0}",
+    'get_all_surveys': "SELECT survey_data, created_at, submission_count FROM surveys ORDER BY created_at DESC",
+    # Affects one row only when the key is new or its previous claim is older than {2}
+    'claim_webhook_event': (
+        "INSERT INTO webhook_events (event_key, received_at) VALUES ({0}, {1}) "
+        "ON CONFLICT (event_key) DO UPDATE SET received_at = excluded.received_at "
+        "WHERE webhook_events.received_at < {2}"
+    ),
+    'release_webhook_event': "DELETE FROM webhook_events WHERE event_key = {0}",
+    'prune_webhook_events': "DELETE FROM webhook_events WHERE received_at < {0}",
+    # Affects one row only when the survey has no artifact key yet or a different one
+    'claim_artifact_key': (
+        "INSERT INTO survey_artifacts (survey_id, artifact_key, updated_at) VALUES ({0}, {1}, {2}) "
+        "ON CONFLICT (survey_id) DO UPDATE SET artifact_key = excluded.artifact_key, updated_at = excluded.updated_at "
+        "WHERE survey_artifacts.artifact_key <> excluded.artifact_key"
+    ),
+    'clear_artifact_key': "DELETE FROM survey_artifacts WHERE survey_id = {0} AND artifact_key = {1}",
+    'add_submission': (
+        "INSERT INTO submissions (id, survey_id, payload, status, next_attempt_at, created_at, updated_at) "
+        "VALUES ({0}, {1}, {2}, 'pending', {3}, {3}, {3})"
+    ),
+    # Lease due submissions to one flusher; the outer conditions are re-checked under the row lock
+    'lease_submissions': (
+        "UPDATE submissions SET lease_until = {0} "
+        "WHERE status = 'pending' AND next_attempt_at <= {1} AND lease_until < {1} AND id IN ("
+        "SELECT id FROM submissions WHERE status = 'pending' AND next_attempt_at <= {1} AND lease_until < {1} "
+        "ORDER BY created_at LIMIT {2}) "
+        "RETURNING id, survey_id, payload, attempts"
+    ),
+    'complete_submission': (
+        "UPDATE submissions SET status = 'sent', item_id = {1}, error = NULL, lease_until = 0, updated_at = {2} "
+        "WHERE id = {0}"
+    ),
+    'retry_submission': (
+        "UPDATE submissions SET status = {1}, attempts = attempts + 1, next_attempt_at = {2}, error = {3}, "
+        "lease_until = 0, updated_at = {4} WHERE id = {0}"
+    ),
+    'submission_backlog': "SELECT status, COUNT(*), MIN(created_at) FROM submissions GROUP BY status",
+    'prune_submissions': "DELETE FROM submissions WHERE status = 'sent' AND updated_at < {0}",
+    # Token bucket: refill by elapsed time * rate (capped at capacity), then take one token.
+    # Affects a row only when a token was available
+    'take_token': (
+        "INSERT INTO rate_buckets (bucket_key, tokens, updated_at) VALUES ({0}, {1} - 1, {2}) "
+        "ON CONFLICT (bucket_key) DO UPDATE SET "
+        "tokens = CASE WHEN rate_buckets.tokens + ({2} - rate_buckets.updated_at) * {3} > {1} THEN {1} "
+        "ELSE rate_buckets.tokens + ({2} - rate_buckets.updated_at) * {3} END - 1, "
+        "updated_at = {2} "
+        "WHERE rate_buckets.tokens + ({2} - rate_buckets.updated_at) * {3} >= 1"
+    ),
+    'prune_rate_buckets': "DELETE FROM rate_buckets WHERE updated_at < {0}",
+    'claim_submission_fingerprint': (
+        "INSERT INTO submission_fingerprints (fingerprint, received_at) VALUES ({0}, {1}) "
+        "ON CONFLICT (fingerprint) DO UPDATE SET received_at = excluded.received_at "
+        "WHERE submission_fingerprints.received_at < {2}"
+    ),
+    'release_submission_fingerprint': "DELETE FROM submission_fingerprints WHERE fingerprint = {0}",
+    'prune_submission_fingerprints': "DELETE FROM submission_fingerprints WHERE received_at < {0}",
+}
+
+
+def _param_count(sql):
+    """Number of distinct {n} placeholders in a statement"""
+    return len(set(re.findall(r'\{(\d+)\}', sql)))
+
+
+class SurveyStore:
+    """Storage backend interface used by the module-level functions below"""
+
+    def init_schema(self):
+        raise NotImplementedError
+
+    def execute(self, name, params=(), fetch=None):
+        """Run a named statement; fetch is None, 'one' or 'all'"""
+        raise NotImplementedError
+
+    def save_survey(self, survey_id, survey_data, imported=False):
+        """Insert or update a survey; imported rows never overwrite existing ones"""
+        now = datetime.now().isoformat()
+        statement = 'import_survey' if imported else 'save_survey'
+        return self.execute(statement, (survey_id, json.dumps(survey_data), now))
+
+    def get_survey(self, survey_id):
+        """Return {'survey_data', 'created_at', 'submission_count'} or None"""
+        row = self.execute('get_survey', (survey_id,), fetch='one')
+        if row is None:
+            return None
+        return {
+            'survey_data': json.loads(row[0]),
+            'created_at': row[1],
+            'submission_count': row[2]
+        }
+
+    def increment_submission_count(self, survey_id):
+        self.execute('increment_submission_count', (survey_id,))
+
+    def claim_webhook_event(self, event_key, window):
+        """True if event_key was not seen in the last window seconds (and records it)"""
+        now = time.time()
+        return self.execute('claim_webhook_event', (event_key, now, now - window)) == 1
+
+    def release_webhook_event(self, event_key):
+        self.execute('release_webhook_event', (event_key,))
+
+    def prune_webhook_events(self, older_than):
+        return self.execute('prune_webhook_events', (older_than,))
+
+    def claim_artifact_key(self, survey_id, artifact_key):
+        """True if artifact_key replaces the survey's previous artifact key (and records it)"""
+        return self.execute('claim_artifact_key', (survey_id, artifact_key, datetime.now().isoformat())) == 1
+
+    def clear_artifact_key(self, survey_id, artifact_key):
+        self.execute('clear_artifact_key', (survey_id, artifact_key))
+
+    def add_submission(self, submission_id, survey_id, payload):
+        self.execute('add_submission', (submission_id, survey_id, json.dumps(payload), time.time()))
+
+    def lease_submissions(self, limit, lease_seconds):
+        """Claim up to limit due submissions as [(id, survey_id, payload, attempts)]"""
+        now = time.time()
+        rows = self.execute('lease_submissions', (now + lease_seconds, now, limit), fetch='all')
+        return [(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def complete_submission(self, submission_id, item_id):
+        self.execute('complete_submission', (submission_id, item_id, time.time()))
+
+    def retry_submission(self, submission_id, status, next_attempt_at, error):
+        self.execute('retry_submission', (submission_id, status, next_attempt_at, error, time.time()))
+
+    def submission_backlog(self):
+        """{status: (count, oldest created_at)}"""
+        return {row[0]: (row[1], row[2]) for row in self.execute('submission_backlog', fetch='all')}
+
+    def prune_submissions(self, older_than):
+        return self.execute('prune_submissions', (older_than,))
+
+    def take_token(self, bucket_key, capacity, rate):
+        """Take one token from a bucket refilled at rate tokens/second; False when empty"""
+        return self.execute('take_token', (bucket_key, capacity, time.time(), rate)) == 1
+
+    def claim_submission_fingerprint(self, fingerprint, window):
+        """True if the fingerprint was not seen in the last window seconds (and records it)"""
+        now = time.time()
+        return self.execute('claim_submission_fingerprint', (fingerprint, now, now - window)) == 1
+
+    def release_submission_fingerprint(self, fingerprint):
+        self.execute('release_submission_fingerprint', (fingerprint,))
+
+    def prune_rate_limits(self, buckets_before, fingerprints_before):
+        self.execute('prune_rate_buckets', (buckets_before,))
+        self.execute('prune_submission_fingerprints', (fingerprints_before,))
+
+    def get_all_surveys(self):
+        """All surveys, most recent first"""
+        surveys = []
+        for survey_json, created_at, submission_count in self.execute('get_all_surveys', fetch='all'):
+            survey_data = json.loads(survey_json)
+            survey_data['submission_count'] = submission_count
+            survey_data['created_at'] = created_at
+            surveys.append(survey_data)
+        return surveys
+
+
+class SQLiteSurveyStore(SurveyStore):
+    """SQLite backend in WAL mode with one connection per thread"""
+
+    def __init__(self, path=SURVEYS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        # Statement text is constant, so sqlite3's statement cache keeps them prepared
+        self._sql = {
+            name: sql.format(*[f"?{i + 1}" for i in range(_param_count(sql))])
+            for name, sql in STATEMENTS.items()
+        }
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self):
+        conn = self._connect()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def execute(self, name, params=(), fetch=None):
+        cursor = self._connect().execute(self._sql[name], params)
+        if fetch == 'one':
+            return cursor.fetchone()
+        if fetch == 'all':
+            return cursor.fetchall()
+        return cursor.rowcount
+
+
+class PostgresSurveyStore(SurveyStore):
+    """Postgres backend using server-side prepared statements on pooled connections"""
+
+    def __init__(self, dsn, pool_size=POSTGRES_POOL_SIZE):
+        # Imported here so SQLite deployments do not need psycopg2
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self._pool = ThreadedConnectionPool(1, pool_size, dsn)
+        # Held weakly by connection object: an id() could be reused by a replacement connection
+        self._prepared = weakref.WeakSet()
+        self._param_counts = {}
+        self._prepare_sql = {}
+        for name, sql in STATEMENTS.items():
+            count = _param_count(sql)
+            self._param_counts[name] = count
+            self._prepare_sql[name] = f"PREPARE {name} AS " + sql.format(*[f"${i + 1}" for i in range(count)])
+
+    def _prepare(self, conn):
+        if conn in self._prepared:
+            return
+        with conn.cursor() as cursor:
+            for sql in self._prepare_sql.values():
+                cursor.execute(sql)
+        conn.commit()
+        self._prepared.add(conn)
+
+    def init_schema(self):
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                for statement in SCHEMA:
+                    cursor.execute(statement)
+            conn.commit()
+        finally:
+            self._pool.putconn(conn)
+
+    def execute(self, name, params=(), fetch=None):
+        conn = self._pool.getconn()
+        try:
+            self._prepare(conn)
+            placeholders = ", ".join(["%s"] * self._param_counts[name])
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXECUTE {name} ({placeholders})" if placeholders else f"EXECUTE {name}", params)
+                if fetch == 'one':
+                    result = cursor.fetchone()
+                elif fetch == 'all':
+                    result = cursor.fetchall()
+                else:
+                    result = cursor.rowcount
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn)
+
+
+# Cache value of a survey that a refresh found deleted upstream
+_GONE = object()
+
+
+class SurveyCache:
+    """Bounded LRU cache of survey data with TTL refresh and short-lived negative entries"""
+
+    def __init__(self, max_size=SURVEY_CACHE_SIZE, ttl=SURVEY_CACHE_TTL, negative_ttl=SURVEY_NEGATIVE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def get(self, survey_id):
+        """Return (state, survey_data) where state is 'fresh', 'stale', 'missing', 'gone' or None
+
+        Surveys deleted upstream are 'gone' (and 'stale' with no data once it is
+        time to check again), so the stored copy is not served in the meantime.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(survey_id)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            survey_data, expires_at = entry
+            if survey_data is _GONE:
+                self.negative_hits += 1
+                return ('gone' if now < expires_at else 'stale'), None
+            if survey_data is None:
+                if now >= expires_at:
+                    del self._entries[survey_id]
+                    self.misses += 1
+                    return None, None
+                self.negative_hits += 1
+                return 'missing', None
+            self._entries.move_to_end(survey_id)
+            self.hits += 1
+            return ('fresh' if now < expires_at else 'stale'), survey_data
+
+    def _set(self, survey_id, survey_data, ttl):
+        with self._lock:
+            self._entries[survey_id] = (survey_data, time.monotonic() + ttl)
+            self._entries.move_to_end(survey_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, survey_id, survey_data, ttl=None):
+        self._set(survey_id, survey_data, self.ttl if ttl is None else ttl)
+
+    def put_missing(self, survey_id):
+        """Remember that a survey does not exist upstream"""
+        self._set(survey_id, None, self.negative_ttl)
+
+    def put_gone(self, survey_id, ttl=None):
+        """Remember that a stored survey was deleted upstream (checked again after the TTL)"""
+        self._set(survey_id, _GONE, self.ttl if ttl is None else ttl)
+
+    def begin_refresh(self, survey_id):
+        """True for the one caller that should refresh a stale entry; the others keep serving it"""
+        with self._lock:
+            if survey_id in self._refreshing:
+                return False
+            self._refreshing.add(survey_id)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, survey_id):
+        with self._lock:
+            self._refreshing.discard(survey_id)
+
+    def invalidate(self, survey_id):
+        with self._lock:
+            self._entries.pop(survey_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'evictions': self.evictions,
+                'refreshes': self.refreshes,
+                'refreshing': len(self._refreshing)
+            }
+
+
+survey_cache = SurveyCache()
+survey_flights = SingleFlight()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Get the configured storage backend"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if DATABASE_URL.startswith(('postgres://', 'postgresql://')):
+                    _store = PostgresSurveyStore(DATABASE_URL)
+                else:
+                    _store = SQLiteSurveyStore(DATABASE_URL.replace('sqlite:///', '', 1) or SURVEYS_DB_PATH)
+                _store.init_schema()
+    return _store
+
+
+def migrate_env_surveys():
+    """Import legacy SURVEY_<id> environment entries into the store"""
+    store = get_store()
+    imported = 0
+    for key, value in list(os.environ.items()):
+        if not key.startswith("SURVEY_"):
+            continue
+        survey_id = key[len("SURVEY_"):]
+        try:
+            survey_data = json.loads(value)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping unreadable legacy survey entry {key}")
+            continue
+        if not isinstance(survey_data, dict):
+            continue
+        imported += store.save_survey(survey_id, survey_data, imported=True) or 0
+    if imported:
+        logger.info(f"Imported {imported} legacy surveys from environment variables")
+    return imported
+
 
 def init_database():
-    """Initialize in-memory storage - no action needed for Vercel"""
-    pass
+    """Create the schema and import any legacy environment-backed surveys"""
+    get_store()
+    migrate_env_surveys()
+
 
 def save_survey(survey_id, survey_data):
-    """Save survey data to in-memory storage and environment variable for persistence"""
-    surveys_storage[survey_id] = {
-        'survey_data': survey_data,
-        'created_at': datetime.now().isoformat(),
-        'submission_count': 0
-    }
-    
-    # Also save to environment variable for persistence across serverless restarts
-    # Note: This is a simplified approach - in production you'd use a database
-    env_key = f"SURVEY_{survey_id}"
-    os.environ[env_key] = json.dumps(survey_data)
+    """Save survey data to the store"""
+    get_store().save_survey(survey_id, survey_data)
+    survey_cache.put(survey_id, survey_data)
+
 
 def get_survey(survey_id):
-    """Get survey data from in-memory storage or environment variable"""
-    # First check in-memory storage
-    if survey_id in surveys_storage:
-        return surveys_storage[survey_id]['survey_data']
-    
-    # If not in memory, check environment variable
-    env_key = f"SURVEY_{survey_id}"
-    survey_json = os.environ.get(env_key)
-    if survey_json:
-        try:
-            survey_data = json.loads(survey_json)
-            # Restore to in-memory storage
-            surveys_storage[survey_id] = {
-                'survey_data': survey_data,
-                'created_at': datetime.now().isoformat(),
-                'submission_count': submission_counts.get(survey_id, 0)
-            }
+    """Get survey data from the cache or the store (None once deleted upstream)"""
+    state, survey_data = survey_cache.get(survey_id)
+    # Deleted upstream: only lookup_survey's recheck may bring the stored copy back
+    if state == 'gone' or (state == 'stale' and survey_data is None):
+        return None
+    if survey_data is not None:
+        return survey_data
+
+    record = get_store().get_survey(survey_id)
+    if record is None:
+        return None
+
+    survey_cache.put(survey_id, record['survey_data'])
+    return record['survey_data']
+
+
+def lookup_survey(survey_id, loader):
+    """Get a survey, falling back to loader() for unknown or expired entries
+
+    loader returns the survey data, None when the survey does not exist
+    upstream (cached as a negative entry), or raises on transient errors.
+    Concurrent lookups for the same ID share a single loader() call; while a
+    stale entry is refreshed, only the refreshing caller waits for it.
+    """
+    state, survey_data = survey_cache.get(survey_id)
+    if state == 'fresh':
+        return survey_data
+    if state == 'gone':
+        return None
+
+    if state == 'stale':
+        if not survey_cache.begin_refresh(survey_id):
             return survey_data
-        except json.JSONDecodeError:
-            pass
-    
-    return None
+        try:
+            return _refresh_survey(survey_id, survey_data, loader)
+        finally:
+            survey_cache.end_refresh(survey_id)
+
+    # Negative entries only skip the upstream call; the store may have been filled by another worker
+    record = get_store().get_survey(survey_id)
+    if record is not None:
+        survey_cache.put(survey_id, record['survey_data'])
+        return record['survey_data']
+    if state == 'missing':
+        return None
+
+    try:
+        return survey_flights.do(survey_id, lambda: _load_survey(survey_id, loader))
+    except Exception as e:
+        logger.warning(f"Could not load survey {survey_id}: {e}")
+        return None
+
+
+def _load_survey(survey_id, loader):
+    """Fetch a survey upstream while holding the cross-process lock for its ID"""
+    with file_lock(f"survey:{survey_id}"):
+        # Another worker may have stored it while we waited for the lock
+        record = get_store().get_survey(survey_id)
+        if record is not None:
+            survey_cache.put(survey_id, record['survey_data'])
+            return record['survey_data']
+
+        survey_data = loader()
+        if survey_data is None:
+            survey_cache.put_missing(survey_id)
+            return None
+
+        save_survey(survey_id, survey_data)
+        return survey_data
+
+
+def _refresh_survey(survey_id, survey_data, loader):
+    """Refresh upstream fields; keep the cached copy on errors, drop it if the survey was deleted"""
+    try:
+        refreshed = loader()
+    except Exception as e:
+        logger.warning(f"Could not refresh survey {survey_id}: {e}")
+        # Try again soon rather than a full TTL later
+        if survey_data is None:
+            survey_cache.put_gone(survey_id, ttl=survey_cache.negative_ttl)
+        else:
+            survey_cache.put(survey_id, survey_data, ttl=survey_cache.negative_ttl)
+        return survey_data
+
+    if refreshed is None:
+        logger.info(f"Survey {survey_id} no longer exists upstream")
+        survey_cache.put_gone(survey_id)
+        return None
+    save_survey(survey_id, refreshed)
+    return refreshed
+
+
+def get_cache_stats():
+    """Hit/miss/eviction counters for the survey cache"""
+    stats = survey_cache.stats()
+    stats['single_flight'] = survey_flights.stats()
+    return stats
+
 
 def increment_submission_count(survey_id):
     """Increment submission count for a survey"""
-    if survey_id in surveys_storage:
-        surveys_storage[survey_id]['submission_count'] += 1
-    
-    # Also track in persistent counter
-    submission_counts[survey_id] = submission_counts.get(survey_id, 0) + 1
+    get_store().increment_submission_count(survey_id)
+
 
 def get_all_surveys():
     """Get all surveys with their submission counts"""
-    surveys = []
-    
-    # Get surveys from in-memory storage
-    for survey_id, data in surveys_storage.items():
-        survey_data = data['survey_data'].copy()
-        survey_data['submission_count'] = data['submission_count']
-        survey_data['created_at'] = data['created_at']
-        surveys.append(survey_data)
-    
-    # Also check environment variables for surveys not in memory
-    for key, value in os.environ.items():
-        if key.startswith("SURVEY_"):
-            survey_id = key.replace("SURVEY_", "")
-            if survey_id not in surveys_storage:
-                try:
-                    survey_data = json.loads(value)
-                    survey_data['submission_count'] = submission_counts.get(survey_id, 0)
-                    survey_data['created_at'] = datetime.now().isoformat()
-                    surveys.append(survey_data)
-                except json.JSONDecodeError:
-                    pass
-    
-    # Sort by creation date (most recent first)
-    surveys.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return surveys
+    return get_store().get_all_surveys()
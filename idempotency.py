@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from counters import Counters
+from database import get_store
+
+# Deliveries of the same event (or the same item/payload) inside this window are duplicates
+WEBHOOK_DEDUP_WINDOW = float(os.environ.get("WEBHOOK_DEDUP_WINDOW", "300"))
+# Old event keys are pruned every this many claims
+WEBHOOK_PRUNE_EVERY = 100
+
+# Event fields that differ between deliveries of one logical change
+VOLATILE_EVENT_FIELDS = ('triggerUuid', 'triggerTime', 'changedAt', 'subscriptionId', 'originalTriggerUuid')
+
+logger = logging.getLogger(__name__)
+
+_stats = Counters(
+    'received',
+    'duplicates_suppressed',
+    'artifacts_queued',
+    'artifacts_unchanged'
+)
+
+
+def webhook_event_keys(event):
+    """Idempotency keys for a Monday.com webhook event
+
+    Retried deliveries repeat the triggerUuid; separate events for one logical
+    change share the pulse ID and the payload once volatile fields are removed.
+    """
+    keys = []
+    if event.get('triggerUuid'):
+        keys.append(f"event:{event['triggerUuid']}")
+    stable = {key: value for key, value in event.items() if key not in VOLATILE_EVENT_FIELDS}
+    payload_hash = hashlib.sha256(json.dumps(stable, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    keys.append(f"pulse:{event.get('pulseId')}:{payload_hash}")
+    return keys
+
+
+def claim_webhook(event, window=WEBHOOK_DEDUP_WINDOW):
+    """True for the first delivery of an event inside the window, False for duplicates"""
+    received = _stats.increment('received')
+    store = get_store()
+    if received % WEBHOOK_PRUNE_EVERY == 0:
+        store.prune_webhook_events(time.time() - window)
+
+    for key in webhook_event_keys(event):
+        if not store.claim_webhook_event(key, window):
+            _stats.increment('duplicates_suppressed')
+            logger.info(f"Suppressed duplicate webhook delivery ({key})")
+            return False
+    return True
+
+
+def release_webhook(event):
+    """Forget a claimed event so Monday.com's retry of a failed delivery is processed"""
+    store = get_store()
+    for key in webhook_event_keys(event):
+        store.release_webhook_event(key)
+
+
+def claim_artifacts(survey_id, artifact_key):
+    """True if the survey's artifacts must be (re)generated for this content key
+
+    The key is recorded in the same statement that compares it, so concurrent
+    deliveries do not queue the same work twice; release_artifacts() forgets it
+    if queueing or generation fails.
+    """
+    if not get_store().claim_artifact_key(survey_id, artifact_key):
+        _stats.increment('artifacts_unchanged')
+        return False
+    _stats.increment('artifacts_queued')
+    return True
+
+
+def release_artifacts(survey_id, artifact_key):
+    """Forget a claimed artifact key so the next webhook regenerates it"""
+    get_store().clear_artifact_key(survey_id, artifact_key)
+
+
+def get_webhook_stats():
+    return _stats.snapshot()
@@ -0,0 +1,341 @@
+"""Resized, correctly typed variants of the static images (plus favicon.ico).
+
+Variants are generated on first use and stored by a hash of their source, so
+replacing a source image regenerates them automatically.
+
+Usage: python image_derivatives.py    (pre-generate every variant and rewrite
+static/images/derivatives.json; run it after changing an image)
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+from io import BytesIO
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+from singleflight import SingleFlight
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DERIVATIVES_DIR = os.environ.get("DERIVATIVES_DIR", os.path.join(tempfile.gettempdir(), "avaliacao_derivatives"))
+# Versioned URLs never change; unversioned ones (used from CSS) are revalidated daily
+DERIVATIVE_MAX_AGE = int(os.environ.get("DERIVATIVE_MAX_AGE", str(24 * 3600)))
+DERIVATIVE_IMMUTABLE_AGE = 365 * 24 * 3600
+# Bump when the encoder settings below change
+DERIVATIVE_VERSION = "1"
+
+# Source image -> widths it is displayed at (1x/2x) and formats, best first; the last is the fallback
+DERIVATIVE_SOURCES = {
+    'images/company-logo.png': {'widths': (250, 526), 'formats': ('avif', 'webp', 'png')},
+    # A JPEG saved under a .png name; the overlay gradient hides compression artifacts
+    'images/fundo.png': {'widths': (640, 1024), 'formats': ('avif', 'webp', 'jpeg')}
+}
+# Size and encodable formats of each source version, so rendering <picture> never imports Pillow
+DERIVATIVES_MANIFEST = os.path.join(STATIC_DIR, 'images', 'derivatives.json')
+FAVICON_SOURCE = os.environ.get("FAVICON_SOURCE", 'images/company-logo.png')
+FAVICON_SIZES = (16, 32, 48)
+
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 55, 'speed': 6}),
+    'webp': ('WEBP', 'image/webp', {'quality': 78, 'method': 6}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True})
+}
+FORMAT_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+# <stem>-<width>[.<version>][.<extension>]
+_NAME = re.compile(r'^(?P<stem>[\w-]+?)-(?P<width>\d+)(?:\.(?P<version>[0-9a-f]{10}))?(?:\.(?P<extension>[a-z]+))?$')
+
+logger = logging.getLogger(__name__)
+
+_versions = {}
+_versions_lock = threading.Lock()
+_renders = SingleFlight()
+_manifest = None
+_manifest_warned = set()
+
+
+def _source_path(name):
+    return os.path.join(STATIC_DIR, *name.split('/'))
+
+
+def _stem(name):
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def _manifest_entry(name):
+    """Manifest data of a source, or None when the manifest predates the source"""
+    global _manifest
+    with _versions_lock:
+        if _manifest is None:
+            try:
+                with open(DERIVATIVES_MANIFEST, encoding='utf-8') as manifest_file:
+                    _manifest = json.load(manifest_file)
+            except (OSError, ValueError):
+                _manifest = {}
+    entry = _manifest.get(name)
+    if entry and entry.get('version') == source_version(name):
+        return entry
+    if name not in _manifest_warned:
+        _manifest_warned.add(name)
+        logger.warning(f"{DERIVATIVES_MANIFEST} is out of date for {name}; reading it with Pillow "
+                       f"until `python image_derivatives.py` is run")
+    return None
+
+
+def _encodable_formats(name):
+    from PIL import features
+
+    formats = DERIVATIVE_SOURCES[name]['formats']
+    return [fmt for fmt in formats if fmt not in ('avif', 'webp') or features.check(fmt)] or [formats[-1]]
+
+
+def available_formats(name):
+    """Configured formats of a source that this Pillow build can encode"""
+    entry = _manifest_entry(name)
+    return entry['formats'] if entry else _encodable_formats(name)
+
+
+def _source_info(name):
+    """{'version', 'size'} of a source image, re-read only when its size or mtime changes"""
+    stat = os.stat(_source_path(name))
+    with _versions_lock:
+        cached = _versions.get(name)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+    with open(_source_path(name), 'rb') as source:
+        data = source.read()
+    info = {'version': hashlib.sha256(data + DERIVATIVE_VERSION.encode('ascii')).hexdigest()[:10], 'size': None}
+    with _versions_lock:
+        _versions[name] = ((stat.st_mtime_ns, stat.st_size), info)
+    return info
+
+
+def source_version(name):
+    """Short content hash of a source image"""
+    return _source_info(name)['version']
+
+
+def source_size(name):
+    """(width, height) of a source image"""
+    # Decoded separately so cache keys (and 304s) never need to load Pillow
+    info = _source_info(name)
+    if info['size'] is None and _manifest_entry(name):
+        info['size'] = tuple(_manifest_entry(name)['size'])
+    if info['size'] is None:
+        from PIL import Image
+
+        with Image.open(_source_path(name)) as img:
+            info['size'] = img.size
+    return info['size']
+
+
+def derivatives_version():
+    """Changes whenever any source image changes (part of cache keys of pages that link variants)"""
+    return "".join(source_version(name) for name in sorted(DERIVATIVE_SOURCES))
+
+
+def find_source(stem):
+    for name in DERIVATIVE_SOURCES:
+        if _stem(name) == stem:
+            return name
+    return None
+
+
+def variant_widths(name):
+    """Configured widths, capped at the source width (never upscaled)"""
+    source_width = source_size(name)[0]
+    return sorted({min(width, source_width) for width in DERIVATIVE_SOURCES[name]['widths']})
+
+
+def variant_filename(name, width, fmt):
+    return f"{_stem(name)}-{width}.{source_version(name)}.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def _encode(name, width, fmt):
+    from PIL import Image
+
+    pil_format, _, options = FORMATS[fmt]
+    with Image.open(_source_path(name)) as img:
+        img.load()
+    if width < img.width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    if fmt == 'jpeg' and has_alpha:
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img.convert('RGBA'), mask=img.convert('RGBA').getchannel('A'))
+        img = background
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def _prune_old_versions(stem, version):
+    """Remove variants of a source generated from an older version of it"""
+    for filename in os.listdir(DERIVATIVES_DIR):
+        match = _NAME.match(filename)
+        if match and match.group('stem') == stem and match.group('version') != version:
+            try:
+                os.remove(os.path.join(DERIVATIVES_DIR, filename))
+            except OSError:
+                pass
+
+
+def get_variant(name, width, fmt):
+    """Path of a variant on disk, generating it first when needed"""
+    filename = variant_filename(name, width, fmt)
+    path = os.path.join(DERIVATIVES_DIR, filename)
+    if os.path.exists(path):
+        return path
+
+    def render():
+        if os.path.exists(path):
+            return path
+        os.makedirs(DERIVATIVES_DIR, exist_ok=True)
+        data = _encode(name, width, fmt)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as variant_file:
+            variant_file.write(data)
+        os.replace(temp_path, path)
+        _prune_old_versions(_stem(name), source_version(name))
+        logger.info(f"Generated {filename} ({len(data)} bytes)")
+        return path
+
+    return _renders.do(path, render)
+
+
+def resolve_variant(filename, accepted_types):
+    """Map a requested variant name to (path, mimetype, versioned, negotiated), or None
+
+    Without an extension the best format the client accepts is chosen; a stale
+    version is answered with the current one.
+    """
+    match = _NAME.match(filename)
+    name = find_source(match.group('stem')) if match else None
+    if name is None:
+        return None
+    width = int(match.group('width'))
+    if width not in variant_widths(name):
+        return None
+
+    formats = available_formats(name)
+    extension = match.group('extension')
+    if extension:
+        fmt = next((fmt for fmt in formats if FORMAT_EXTENSIONS[fmt] == extension), None)
+        if fmt is None:
+            return None
+    else:
+        fmt = next((fmt for fmt in formats[:-1] if FORMATS[fmt][1] in accepted_types), formats[-1])
+
+    versioned = match.group('version') == source_version(name)
+    return get_variant(name, width, fmt), FORMATS[fmt][1], versioned, not extension
+
+
+def picture(name, alt, class_name='', sizes=None):
+    """<picture> markup with a srcset per format for a source image (Jinja global)"""
+    widths = variant_widths(name)
+    sizes = sizes or f"{widths[0]}px"
+    formats = available_formats(name)
+
+    def srcset(fmt):
+        return ", ".join(
+            f"{url_for('survey.image_variant', filename=variant_filename(name, width, fmt))} {width}w" for width in widths
+        )
+
+    source_width, source_height = source_size(name)
+    width, height = widths[0], round(source_height * widths[0] / source_width)
+    sources = "".join(
+        f'<source type="{FORMATS[fmt][1]}" srcset="{srcset(fmt)}" sizes="{escape(sizes)}">' for fmt in formats[:-1]
+    )
+    fallback = formats[-1]
+    src = url_for('survey.image_variant', filename=variant_filename(name, widths[-1], fallback))
+    return Markup(
+        f'<picture>{sources}<img src="{src}" srcset="{srcset(fallback)}" sizes="{escape(sizes)}" '
+        f'width="{width}" height="{height}" alt="{escape(alt)}" class="{escape(class_name)}"></picture>'
+    )
+
+
+def image_url(name, width):
+    """Versioned, format-negotiated URL of a variant, for CSS backgrounds (Jinja global)"""
+    width = min(width, source_size(name)[0])
+    return url_for('survey.image_variant', filename=f"{_stem(name)}-{width}.{source_version(name)}")
+
+
+def get_favicon():
+    """Path of the multi-resolution favicon.ico built from FAVICON_SOURCE"""
+    path = os.path.join(DERIVATIVES_DIR, f"favicon.{source_version(FAVICON_SOURCE)}.ico")
+    if os.path.exists(path):
+        return path
+
+    def render():
+        if os.path.exists(path):
+            return path
+        from PIL import Image
+
+        with Image.open(_source_path(FAVICON_SOURCE)) as img:
+            img = img.convert('RGBA')
+        # Centre the (wide) logo on a transparent square so the icon keeps its proportions
+        side = max(img.size)
+        square = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+        square.paste(img, ((side - img.width) // 2, (side - img.height) // 2))
+        os.makedirs(DERIVATIVES_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        square.save(temp_path, format='ICO', sizes=[(size, size) for size in FAVICON_SIZES])
+        os.replace(temp_path, path)
+        for filename in os.listdir(DERIVATIVES_DIR):
+            if re.match(r'^favicon\.[0-9a-f]{10}\.ico$', filename) and filename != os.path.basename(path):
+                os.remove(os.path.join(DERIVATIVES_DIR, filename))
+        return path
+
+    return _renders.do(path, render)
+
+
+def write_manifest():
+    """Record each source's version, size and the formats this Pillow can encode"""
+    global _manifest
+    from PIL import Image
+
+    manifest = {}
+    for name in sorted(DERIVATIVE_SOURCES):
+        with Image.open(_source_path(name)) as img:
+            size = list(img.size)
+        manifest[name] = {'version': source_version(name), 'size': size, 'formats': _encodable_formats(name)}
+    temp_path = f"{DERIVATIVES_MANIFEST}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        manifest_file.write('\n')
+    os.replace(temp_path, DERIVATIVES_MANIFEST)
+    with _versions_lock:
+        _manifest = manifest
+        _manifest_warned.clear()
+    return manifest
+
+
+def warm_all():
+    """Write the manifest, then generate every variant and the favicon; returns [(filename, bytes)]"""
+    write_manifest()
+    generated = []
+    for name in DERIVATIVE_SOURCES:
+        for width in variant_widths(name):
+            for fmt in available_formats(name):
+                path = get_variant(name, width, fmt)
+                generated.append((os.path.basename(path), os.path.getsize(path)))
+    path = get_favicon()
+    generated.append((os.path.basename(path), os.path.getsize(path)))
+    return generated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for filename, size in warm_all():
+        print(f"{filename}  {size / 1024:.1f} KiB")
+    sys.exit(0)
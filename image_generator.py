@@ -1,56 +1,135 @@
 from PIL import Image, ImageDraw, ImageFont
 import qrcode
 from io import BytesIO
+import logging
 import os
+import threading
+from collections import namedtuple
+
+# Square output image with the QR code centred on the background
+IMAGE_SIZE = 1000
+QR_DISPLAY_SIZE = 700
+BACKGROUND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'images', 'fundoqrpng.png')
+
+# Output encodings: the image is a flat background plus black/white modules, so a
+# 256-colour palette is visually lossless and several times smaller than RGBA
+ImageProfile = namedtuple('ImageProfile', ['format', 'extension', 'content_type', 'convert', 'options'])
+
+PNG_COMPRESS_LEVEL = int(os.environ.get("PNG_COMPRESS_LEVEL", "6"))
+
+logger = logging.getLogger(__name__)
+
+
+def to_palette(img):
+    return img.quantize(256, method=Image.Quantize.FASTOCTREE)
+
+
+def to_rgb(img):
+    """Flatten transparency onto white (for formats without alpha)"""
+    if img.mode != 'RGBA':
+        return img.convert('RGB')
+    flat = Image.new('RGB', img.size, 'white')
+    flat.paste(img, mask=img.getchannel('A'))
+    return flat
+
+
+IMAGE_PROFILES = {
+    'png': ImageProfile('PNG', 'png', 'image/png', None, {'compress_level': PNG_COMPRESS_LEVEL}),
+    'png-fast': ImageProfile('PNG', 'png', 'image/png', None, {'compress_level': 1}),
+    'png-palette': ImageProfile('PNG', 'png', 'image/png', to_palette, {'compress_level': PNG_COMPRESS_LEVEL}),
+    'png-palette-optimized': ImageProfile('PNG', 'png', 'image/png', to_palette, {'optimize': True}),
+    'webp': ImageProfile('WEBP', 'webp', 'image/webp', None, {'quality': 90, 'method': 4}),
+    'jpeg': ImageProfile('JPEG', 'jpg', 'image/jpeg', to_rgb, {'quality': 90, 'optimize': True}),
+}
+SURVEY_IMAGE_PROFILE = os.environ.get("SURVEY_IMAGE_PROFILE", "png")
+
+
+def get_image_profile(name=None):
+    """Output profile by name (defaults to SURVEY_IMAGE_PROFILE, falling back to png)"""
+    name = name or SURVEY_IMAGE_PROFILE
+    profile = IMAGE_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"Unknown image profile '{name}', using png")
+        profile = IMAGE_PROFILES['png']
+    return profile
+
+
+def encode_image(img, profile):
+    """Encode a PIL image with an output profile"""
+    if profile.convert:
+        img = profile.convert(img)
+    img_buffer = BytesIO()
+    img.save(img_buffer, format=profile.format, **profile.options)
+    return img_buffer.getvalue()
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def get_background():
+    """Background decoded and scaled to IMAGE_SIZE once per process (None if unavailable)"""
+    global _background
+    if _background is None:
+        with _background_lock:
+            if _background is None:
+                background = False
+                if os.path.exists(BACKGROUND_PATH):
+                    try:
+                        with Image.open(BACKGROUND_PATH) as source:
+                            background = source.resize((IMAGE_SIZE, IMAGE_SIZE), Image.Resampling.LANCZOS)
+                    except Exception as e:
+                        logger.error(f"Error loading background image: {e}")
+                _background = background
+    return _background or None
+
 
 def generate_qr_code_image(url, size=500):
-    """Generate QR code image for the survey URL"""
+    """Generate a size x size QR code image with whole-pixel modules (no resampling blur)"""
     try:
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
             border=4,
         )
         qr.add_data(url)
         qr.make(fit=True)
+        matrix = qr.get_matrix()
 
-        # Create QR code image
-        qr_img = qr.make_image(fill_color="black", back_color="white")
+        # One pixel per module, then an integer nearest-neighbour upscale
+        modules = len(matrix)
+        box_size = max(1, size // modules)
+        qr_img = Image.new('L', (modules, modules))
+        qr_img.putdata([0 if dark else 255 for row in matrix for dark in row])
+        qr_img = qr_img.resize((modules * box_size, modules * box_size), Image.Resampling.NEAREST)
 
-        # Resize to desired size
-        qr_img = qr_img.resize((size, size), Image.Resampling.LANCZOS)
+        # Pad the remainder (< one module per side) with white to hit the exact size
+        if qr_img.size != (size, size):
+            padded = Image.new('L', (size, size), 255)
+            offset = (size - qr_img.size[0]) // 2
+            padded.paste(qr_img, (offset, offset))
+            qr_img = padded
 
         return qr_img
     except Exception as e:
-        print(f"Error generating QR code image: {e}")
+        logger.error(f"Error generating QR code image: {e}")
         return None
 
-def create_survey_image(survey_data, survey_url):
-    """Create a square image with QR code centered on background"""
+def create_survey_image(survey_data, survey_url, profile=None):
+    """Create a square image with QR code centered on background, encoded with an output profile"""
     try:
-        # Image dimensions (square)
-        img_size = 1000
+        img_size = IMAGE_SIZE
 
-        # Load background image
-        background_path = os.path.join('static', 'images', 'fundoqrpng.png')
-        if os.path.exists(background_path):
-            try:
-                background = Image.open(background_path)
-                # Resize background to fit the square image
-                background = background.resize((img_size, img_size), Image.Resampling.LANCZOS)
-                img = background.copy()
-            except Exception as e:
-                print(f"Error loading background image: {e}")
-                # Fallback to white background
-                img = Image.new('RGB', (img_size, img_size), color='white')
+        # Start from the cached, pre-scaled background
+        background = get_background()
+        if background is not None:
+            img = background.copy()
         else:
             # Fallback to white background
             img = Image.new('RGB', (img_size, img_size), color='white')
 
         # Generate and add QR code
-        # Increased QR code size to 700 and adjusted its generation size
-        qr_code_display_size = 700 
+        qr_code_display_size = QR_DISPLAY_SIZE
         qr_img = generate_qr_code_image(survey_url, qr_code_display_size)
         if qr_img:
             # Center the QR code based on its new display size
@@ -73,13 +152,10 @@ def create_survey_image(survey_data, survey_url):
             draw.text((placeholder_x, placeholder_y), placeholder_text, fill=(100, 100, 100), font=placeholder_font)
 
         # Convert to bytes
-        img_buffer = BytesIO()
-        img.save(img_buffer, format='PNG', quality=95)
-        img_data = img_buffer.getvalue()
-        img_buffer.close()
-
-        return img_data
+        if not isinstance(profile, ImageProfile):
+            profile = get_image_profile(profile)
+        return encode_image(img, profile)
 
     except Exception as e:
-        print(f"Error creating survey image: {e}")
+        logger.error(f"Error creating survey image: {e}")
         return None
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Background job configuration
+# Vercel freezes the function as soon as the response is sent, so jobs run inline there
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "avaliacao_jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0" if os.environ.get("VERCEL") else "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.environ.get("JOB_RETRY_DELAY", "5"))
+JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", "900"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions by name
+_tasks = {}
+
+
+def task(name):
+    """Register a function as a background task"""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+class Job:
+    """A claimed job handed to a task function"""
+
+    def __init__(self, queue, job_id, task_name, payload, steps, attempts):
+        self.queue = queue
+        self.id = job_id
+        self.task = task_name
+        self.payload = payload
+        self.steps = steps
+        self.attempts = attempts
+        self._steps_lock = threading.Lock()
+
+    @property
+    def last_attempt(self):
+        """True when a failure of this attempt will not be retried"""
+        return self.attempts >= self.queue.max_attempts
+
+    def step_done(self, name):
+        """Check whether a step already completed in a previous attempt"""
+        return name in self.steps
+
+    def mark_step(self, name, result=None):
+        """Persist a completed step so retries skip it (safe to call from several threads)"""
+        with self._steps_lock:
+            self.steps[name] = result
+            self.queue._update(self.id, steps=json.dumps(self.steps))
+
+
+class JobQueue:
+    """Durable local job queue backed by SQLite with a pool of worker threads"""
+
+    def __init__(self, db_path=JOBS_DB_PATH, workers=JOB_WORKERS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self._init_schema()
+
+    def _connect(self):
+        """Get the SQLite connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                steps TEXT NOT NULL DEFAULT '{}',
+                result TEXT,
+                error TEXT,
+                run_after REAL NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after)")
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?",
+            list(fields.values()) + [job_id]
+        )
+
+    def start(self):
+        """Recover stale jobs and start the worker threads"""
+        with self._start_lock:
+            if self._started or self.workers <= 0:
+                return
+            self._started = True
+
+            # Jobs left running by a crashed process go back to the queue
+            stale_before = time.time() - JOB_STALE_SECONDS
+            recovered = self._connect().execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND updated_at < ?",
+                (PENDING, RUNNING, stale_before)
+            ).rowcount
+            if recovered:
+                logger.info(f"Recovered {recovered} stale background jobs")
+
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, task_name, payload):
+        """Persist a job and hand it to the workers (or run it inline without workers)"""
+        if task_name not in _tasks:
+            raise KeyError(f"Unknown background task: {task_name}")
+
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            "INSERT INTO jobs (id, task, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, task_name, json.dumps(payload), PENDING, datetime.now().isoformat(), time.time())
+        )
+
+        if self.workers <= 0:
+            job = self._claim(job_id)
+            if job:
+                self._run(job)
+            return job_id
+
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get_status(self, job_id):
+        """Return the public status of a job, or None if it does not exist"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'task': row['task'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'steps': json.loads(row['steps']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at']
+        }
+
+    def pending_count(self):
+        """Number of jobs waiting or running"""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDING, RUNNING)
+        ).fetchone()[0]
+
+    def drain(self, timeout=None):
+        """Block until every queued job has finished; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending_count():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not self._started:
+                # Nobody is consuming the queue, so run the work in the caller
+                job = self._claim(ignore_delay=True)
+                if job:
+                    self._run(job)
+                continue
+            time.sleep(0.05)
+        return True
+
+    def _claim(self, job_id=None, ignore_delay=False):
+        """Atomically move one pending job to running"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if job_id:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE id = ? AND status = ?", (job_id, PENDING)
+                ).fetchone()
+            else:
+                run_after = float('inf') if ignore_delay else time.time()
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND run_after <= ? ORDER BY created_at LIMIT 1",
+                    (PENDING, run_after)
+                ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, time.time(), row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return Job(self, row['id'], row['task'], json.loads(row['payload']),
+                   json.loads(row['steps']), row['attempts'] + 1)
+
+    def _run(self, job):
+        """Execute a claimed job and record the outcome"""
+        func = _tasks.get(job.task)
+        started = time.monotonic()
+        try:
+            if func is None:
+                raise KeyError(f"Unknown background task: {job.task}")
+            result = func(job)
+            self._update(job.id, status=DONE, result=json.dumps(result), error=None)
+            logger.info(f"Job {job.id} ({job.task}) done in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.task}) failed on attempt {job.attempts}")
+            if job.attempts < self.max_attempts:
+                self._update(job.id, status=PENDING, error=str(e),
+                             run_after=time.time() + JOB_RETRY_DELAY * job.attempts)
+            else:
+                self._update(job.id, status=FAILED, error=str(e))
+
+    def _worker_loop(self):
+        while not self._stopping:
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run(job)
+
+
+# Default queue used by the app
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Get the process-wide job queue"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def enqueue(task_name, payload):
+    """Queue a background task and return its job ID"""
+    return get_queue().enqueue(task_name, payload)
+
+
+def get_job_status(job_id):
+    """Get the status of a background job"""
+    return get_queue().get_status(job_id)
+
+
+def drain(timeout=None):
+    """Wait for all queued background jobs to finish"""
+    return get_queue().drain(timeout)
@@ -0,0 +1,165 @@
+import logging
+import re
+from collections import namedtuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MONTHS_PT = {
+    1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
+    5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
+    9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+}
+
+
+def format_date_portuguese(date_str):
+    """Format date string to Portuguese format (e.g., 'Maio de 2025')"""
+    try:
+        # Try different date formats that might come from Monday.com
+        for date_format in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']:
+            try:
+                date_obj = datetime.strptime(date_str, date_format)
+                month_name = MONTHS_PT.get(date_obj.month, "")
+                return f"{month_name} de {date_obj.year}"
+            except ValueError:
+                continue
+
+        # If none of the formats work, try to extract year and month from string
+        # Look for YYYY-MM pattern
+        match = re.search(r'(\d{4})-(\d{1,2})', date_str)
+        if match:
+            year = int(match.group(1))
+            month = int(match.group(2))
+            month_name = MONTHS_PT.get(month, "")
+            return f"{month_name} de {year}"
+
+        # Look for MM/YYYY or MM-YYYY pattern
+        match = re.search(r'(\d{1,2})[/-](\d{4})', date_str)
+        if match:
+            month = int(match.group(1))
+            year = int(match.group(2))
+            month_name = MONTHS_PT.get(month, "")
+            return f"{month_name} de {year}"
+
+        return date_str  # Return original if can't parse
+
+    except Exception as e:
+        logger.warning(f"Error formatting date '{date_str}': {e}")
+        return date_str
+
+
+def mirror_value(col):
+    """Mirror columns use display_value; fall back to text, then value"""
+    return col.get('display_value') or col.get('text') or col.get('value') or None
+
+
+def text_value(col):
+    return col.get('text') or None
+
+
+def stripped_text(col):
+    text = col.get('text')
+    if text and text.strip():
+        return text.strip()
+    return None
+
+
+# column_id -> survey field; when several columns feed one field the first listed wins
+ColumnSpec = namedtuple('ColumnSpec', ['column_id', 'field', 'reader', 'parser'])
+
+SURVEY_COLUMNS = (
+    ColumnSpec('lookup_mkrjh91x', 'location', mirror_value, None),  # Destination (mirror)
+    ColumnSpec('lookup_mkrjpdz0', 'date', mirror_value, format_date_portuguese),  # Date (mirror)
+    ColumnSpec('data', 'date', text_value, None),  # Original date column (fallback)
+    ColumnSpec('lookup_mkrjpdz0', 'original_date', mirror_value, None),  # Raw date for result items
+    ColumnSpec('lookup_mkrb9ns5', 'company_name', mirror_value, None),  # Company (mirror)
+    ColumnSpec('text_mkrj9z52', 'hotel_1', stripped_text, None),
+    ColumnSpec('text_mkrjz0tf', 'hotel_2', stripped_text, None),
+    ColumnSpec('color_mkrjt1p5', 'has_guides', text_value, lambda text: text == "Sim"),
+    ColumnSpec('board_relation_mkrbw0h7', 'board_relation_value', stripped_text, None),
+    ColumnSpec('lookup_mkrkwqep', 'lookup_mkrkwqep_value', mirror_value, None),
+)
+
+FIELD_DEFAULTS = {
+    'location': "Unknown Location",
+    'date': "Unknown Date",
+    'company_name': "Unknown Company",
+    'hotel_1': None,
+    'hotel_2': None,
+    'has_guides': False,
+    'original_date': None,
+    'board_relation_value': None,
+    'lookup_mkrkwqep_value': None,
+}
+
+
+class ColumnExtractor:
+    """Single-pass extractor compiled from a column spec table"""
+
+    def __init__(self, specs, defaults):
+        self.defaults = defaults
+        self._by_column = {}
+        for priority, spec in enumerate(specs):
+            self._by_column.setdefault(spec.column_id, []).append((priority, spec))
+        self.column_ids = list(self._by_column)
+
+    def extract(self, column_values):
+        """Map Monday.com column_values to survey fields"""
+        found = {}
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for col in column_values:
+            specs = self._by_column.get(col.get('id'))
+            if not specs:
+                continue
+            if debug:
+                logger.debug(f"Column {col.get('id')}: display_value={col.get('display_value')!r} "
+                             f"text={col.get('text')!r} value={col.get('value')!r}")
+            for priority, spec in specs:
+                raw = spec.reader(col)
+                if raw is None:
+                    continue
+                current = found.get(spec.field)
+                if current is None or priority < current[0]:
+                    found[spec.field] = (priority, spec.parser(raw) if spec.parser else raw)
+
+        fields = dict(self.defaults)
+        fields.update({field: value for field, (priority, value) in found.items()})
+        if debug:
+            logger.debug(f"Extracted survey fields: {fields}")
+        return fields
+
+    def graphql_selection(self):
+        """column_values selection limited to the columns the extractor reads"""
+        ids = ", ".join(f'"{column_id}"' for column_id in self.column_ids)
+        return (
+            f"column_values(ids: [{ids}]) {{\n"
+            "                id\n"
+            "                text\n"
+            "                value\n"
+            "                ... on MirrorValue {\n"
+            "                    display_value\n"
+            "                }\n"
+            "            }"
+        )
+
+
+survey_extractor = ColumnExtractor(SURVEY_COLUMNS, FIELD_DEFAULTS)
+
+
+def build_survey_data(pulse_id, trip_name, column_values):
+    """Survey record for a Monday.com item"""
+    fields = survey_extractor.extract(column_values)
+    return {
+        'survey_id': str(pulse_id),  # Consistent ID from pulse_id (numeric only)
+        'location': fields['location'],
+        'date': fields['date'],
+        'trip_name': trip_name,
+        'company_name': fields['company_name'],
+        'pulse_id': pulse_id,
+        'hotel_1': fields['hotel_1'],
+        'hotel_2': fields['hotel_2'],
+        'has_guides': fields['has_guides'],
+        'original_date': fields['original_date'],
+        'board_relation_value': fields['board_relation_value'],
+        'lookup_mkrkwqep_value': fields['lookup_mkrkwqep_value']
+    }
@@ -0,0 +1,66 @@
+import logging
+
+from database import get_survey, lookup_survey
+from monday_client import get_client, MondayAPIError
+from monday_columns import build_survey_data, survey_extractor
+
+logger = logging.getLogger(__name__)
+
+
+def monday_graphql_request(query, variables=None, idempotent=None):
+    """Make a GraphQL request to Monday.com API"""
+    return get_client().execute(query, variables, idempotent=idempotent)
+
+def get_item_data(item_id):
+    """Fetch item data for the columns the survey extractor reads"""
+    query = f"""
+    query($itemId: [ID!]) {{
+        items(ids: $itemId) {{
+            id
+            name
+            {survey_extractor.graphql_selection()}
+        }}
+    }}
+    """
+
+    variables = {
+        "itemId": [str(item_id)]
+    }
+
+    result = monday_graphql_request(query, variables)
+    return result
+
+def fetch_survey_from_monday(pulse_id):
+    """Build survey data from Monday.com; returns None if the item does not exist, raises on API errors"""
+    # Fetch item data from Monday.com
+    item_data_response = get_item_data(pulse_id)
+
+    if 'errors' in item_data_response:
+        raise MondayAPIError(f"GraphQL error: {item_data_response['errors']}")
+
+    items = (item_data_response.get('data') or {}).get('items') or []
+    if not items:
+        return None
+
+    item = items[0]
+    return build_survey_data(pulse_id, item.get('name', 'Unknown Trip'), item.get('column_values', []))
+
+def reconstruct_survey_from_monday(pulse_id):
+    """Reconstruct survey data from Monday.com API using pulse_id"""
+    try:
+        return fetch_survey_from_monday(pulse_id)
+    except Exception as e:
+        logger.error(f"Error reconstructing survey from Monday.com: {str(e)}")
+        return None
+
+def load_survey(survey_id):
+    """Get a survey from storage, reconstructing it from Monday.com for pulse IDs"""
+    if survey_id.isdigit():
+        pulse_id = survey_id
+    # Handle legacy monday_ prefix format for backwards compatibility
+    elif survey_id.startswith('monday_'):
+        pulse_id = survey_id.replace('monday_', '')
+    else:
+        return get_survey(survey_id)
+
+    return lookup_survey(survey_id, lambda: fetch_survey_from_monday(pulse_id))
@@ -1,4 +1,8 @@
+import logging
 import os
+import threading
+import zlib
+from functools import cached_property
 import qrcode
 from io import BytesIO
 from reportlab.lib.pagesizes import letter, A4
@@ -8,10 +12,27 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.platypus.tableofcontents import TableOfContents
-from reportlab.platypus.flowables import HRFlowable
+from reportlab.platypus.flowables import HRFlowable, Flowable
+from reportlab.lib.utils import ImageReader
+from reportlab import rl_config
+from reportlab.pdfbase.pdfmetrics import stringWidth
 # Removed Table, TableStyle, HexColor imports as they are no longer needed for the banner
 from PIL import Image as PILImage # Import PIL for image dimension inspection
 
+# Bump when the layout changes so cached PDFs are re-rendered
+PDF_TEMPLATE_VERSION = "2"
+
+# Survey fields that appear in the PDF (the artifact cache key is built from these)
+PDF_FIELDS = ('company_name', 'location', 'date', 'trip_name')
+
+logger = logging.getLogger(__name__)
+
+# Binary image streams: ASCII85 only matters for 7-bit transports, makes the
+# file a quarter larger and is encoded in pure Python
+rl_config.useA85 = 0
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'images', 'pdfqr.png')
+
 def generate_qr_code(url):
     """Generate QR code for the survey URL"""
     try:
@@ -34,137 +55,446 @@ def generate_qr_code(url):
 
         return img_buffer
     except Exception as e:
-        print(f"Error generating QR code: {e}")
+        logger.error(f"Error generating QR code: {e}")
         # Return empty buffer if QR generation fails
         return BytesIO()
 
-def create_survey_pdf(survey_data, survey_url):
-    """Create a PDF with company logo and QR code for the survey"""
-    buffer = BytesIO()
-
-    # Create the PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=18,
-        bottomMargin=18
+def qr_matrix(url):
+    """QR module matrix for the survey URL, quiet-zone border included"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=4,
     )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.get_matrix()
 
-    # Container for the 'Flowable' objects
-    elements = []
-
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#667eea')
-    )
 
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#4a5568')
-    )
+def qr_runs(matrix):
+    """Dark modules as (row, start column, length) runs, one per horizontal stretch"""
+    runs = []
+    for row_index, row in enumerate(matrix):
+        start = None
+        for col_index, dark in enumerate(row):
+            if dark and start is None:
+                start = col_index
+            elif not dark and start is not None:
+                runs.append((row_index, start, col_index - start))
+                start = None
+        if start is not None:
+            runs.append((row_index, start, len(row) - start))
+    return runs
 
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=12,
-        alignment=TA_LEFT,
-        textColor=colors.HexColor('#2d3748')
-    )
 
-    # Add company logo - simplified for serverless environment
-    logo_path = os.path.join('static', 'images', 'pdfqr.png')
+class VectorQRCode(Flowable):
+    """QR code drawn as filled rectangles, one per run of dark modules"""
 
-    if os.path.exists(logo_path):
-        try:
+    def __init__(self, url, size):
+        super().__init__()
+        self.matrix = qr_matrix(url)
+        self.width = size
+        self.height = size
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        modules = len(self.matrix)
+        module = self.width / modules
+        canv = self.canv
+        canv.saveState()
+        canv.setFillColor(colors.white)
+        canv.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+        canv.setFillColor(colors.black)
+        path = canv.beginPath()
+        for row, start, length in qr_runs(self.matrix):
+            # PDF y grows upwards, matrix rows go downwards
+            path.rect(start * module, (modules - row - 1) * module, length * module, module)
+        canv.drawPath(path, stroke=0, fill=1)
+        canv.restoreState()
+
+
+def _image_xobject(image, color_space):
+    """(entries, data) of an 8-bit image XObject stream for a PIL image"""
+    entries = (b'/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /%s /BitsPerComponent 8 /Filter /FlateDecode'
+               % (image.width, image.height, color_space))
+    return entries, zlib.compress(image.tobytes())
+
+
+class PreparedImage:
+    """Image decoded once per process, then drawn into each PDF with Canvas.drawImage"""
+
+    def __init__(self, path):
+        self.path = path
+        # The ImageReader keeps the decoded pixels, so renders only compress them
+        self.reader = ImageReader(path)
+        self.reader.getRGBData()
+        self.width, self.height = self.reader.getSize()
+
+    def draw(self, canv, x, y, width, height):
+        canv.drawImage(self.reader, x, y, width, height, mask='auto')
+
+    @cached_property
+    def streams(self):
+        """(image, smask) Flate-compressed image XObject streams as (entries, data), built once
+
+        smask is None for images without an alpha channel. Used by writers that
+        emit PDF objects themselves (iter_print_sheet).
+        """
+        with PILImage.open(self.path) as image:
+            image.load()
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        smask = _image_xobject(image.getchannel('A'), b'DeviceGray') if has_alpha else None
+        return _image_xobject(image.convert('RGB'), b'DeviceRGB'), smask
+
+
+class PreparedImageFlowable(Flowable):
+    """Platypus wrapper for a PreparedImage"""
+
+    def __init__(self, image, width, height):
+        super().__init__()
+        self.image = image
+        self.width = width
+        self.height = height
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        self.image.draw(self.canv, 0, 0, self.width, self.height)
+
+
+class SurveyPDFTemplate:
+    """Styles and logo loaded once per process and reused across renders"""
+
+    def __init__(self, logo_path=LOGO_PATH):
+        # Define styles
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#667eea')
+        )
+
+        self.subtitle_style = ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#4a5568')
+        )
+
+        self.normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=12,
+            spaceAfter=12,
+            alignment=TA_LEFT,
+            textColor=colors.HexColor('#2d3748')
+        )
+
+        # Company logo - simplified for serverless environment
+        self.logo = None
+        if os.path.exists(logo_path):
+            try:
+                self.logo = PreparedImage(logo_path)
+            except Exception as e:
+                logger.error(f"Error loading logo: {e}")
+                # Continue without logo if there's an error
+
+    def render(self, survey_data, survey_url):
+        """Create a PDF with company logo and QR code for the survey"""
+        buffer = BytesIO()
+
+        # Create the PDF document
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=18,
+            bottomMargin=18
+        )
+
+        # Container for the 'Flowable' objects
+        elements = []
+
+        if self.logo is not None:
             # Simple logo sizing - fixed dimensions for reliability
-            logo = Image(logo_path, width=7.5*inch, height=1.248*inch)
+            logo = PreparedImageFlowable(self.logo, width=7.5*inch, height=1.248*inch)
             logo.hAlign = 'CENTER'
             elements.append(logo)
             elements.append(Spacer(1, 20))
-        except Exception as e:
-            print(f"Error adding logo: {e}")
-            # Continue without logo if there's an error
-
-    # Add title
-    title = Paragraph("Pesquisa de Experiência de Viagem", title_style)
-    elements.append(title)
-
-    # Add subtitle
-    subtitle = Paragraph("Escaneie o QR Code para acessar a pesquisa", subtitle_style)
-    elements.append(subtitle)
-    elements.append(Spacer(1, 20))
-
-    # Add trip details
-    details = [
-        f"<b>Empresa:</b> {survey_data.get('company_name', 'N/A')}",
-        f"<b>Destino:</b> {survey_data.get('location', 'N/A')}",
-        f"<b>Data:</b> {survey_data.get('date', 'N/A')}",
-        f"<b>Viagem:</b> {survey_data.get('trip_name', 'N/A')}"
-    ]
 
-    for detail in details:
-        elements.append(Paragraph(detail, normal_style))
+        # Add title
+        title = Paragraph("Pesquisa de Experiência de Viagem", self.title_style)
+        elements.append(title)
 
-    elements.append(Spacer(1, 30))
+        # Add subtitle
+        subtitle = Paragraph("Escaneie o QR Code para acessar a pesquisa", self.subtitle_style)
+        elements.append(subtitle)
+        elements.append(Spacer(1, 20))
 
-    # Add horizontal line
-    line = HRFlowable(width="100%", thickness=2, color=colors.HexColor('#667eea'))
-    elements.append(line)
-    elements.append(Spacer(1, 20))
+        # Add trip details
+        details = [
+            f"<b>Empresa:</b> {survey_data.get('company_name', 'N/A')}",
+            f"<b>Destino:</b> {survey_data.get('location', 'N/A')}",
+            f"<b>Data:</b> {survey_data.get('date', 'N/A')}",
+            f"<b>Viagem:</b> {survey_data.get('trip_name', 'N/A')}"
+        ]
 
-    # Generate and add QR code
-    try:
-        qr_buffer = generate_qr_code(survey_url)
-        if qr_buffer.getbuffer().nbytes > 0:
-            qr_image = Image(qr_buffer, width=3*inch, height=3*inch)
-            qr_image.hAlign = 'CENTER'
-            elements.append(qr_image)
-            print("QR code successfully added to PDF")
-        else:
+        for detail in details:
+            elements.append(Paragraph(detail, self.normal_style))
+
+        elements.append(Spacer(1, 30))
+
+        # Add horizontal line
+        line = HRFlowable(width="100%", thickness=2, color=colors.HexColor('#667eea'))
+        elements.append(line)
+        elements.append(Spacer(1, 20))
+
+        # Generate and add QR code
+        try:
+            qr_code = VectorQRCode(survey_url, 3*inch)
+            qr_code.hAlign = 'CENTER'
+            elements.append(qr_code)
+        except Exception as e:
+            logger.error(f"Error with QR code: {e}")
             # Add placeholder text if QR code fails
-            qr_placeholder = Paragraph("QR Code não pôde ser gerado", subtitle_style)
+            qr_placeholder = Paragraph("QR Code não pôde ser gerado", self.subtitle_style)
             elements.append(qr_placeholder)
-            print("QR code generation failed, added placeholder text")
-    except Exception as e:
-        print(f"Error with QR code: {e}")
-        # Add placeholder text if QR code fails
-        qr_placeholder = Paragraph("QR Code não pôde ser gerado", subtitle_style)
-        elements.append(qr_placeholder)
 
-    elements.append(Spacer(1, 20))
+        elements.append(Spacer(1, 20))
+
+        # Add QR code instructions
+        instructions = [
+
+        ]
+
+        for instruction in instructions:
+            elements.append(Paragraph(instruction, self.normal_style))
+
+        elements.append(Spacer(1, 20))
+
+        # Add URL as text (backup)
+        url_text = f"<b>Link direto:</b> {survey_url}"
+        elements.append(Paragraph(url_text, self.normal_style))
+
+        # Build PDF
+        doc.build(elements)
+
+        # Get the value of the BytesIO buffer and return
+        pdf_data = buffer.getvalue()
+        buffer.close()
+
+        return pdf_data
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_pdf_template():
+    """Get the process-wide PDF template, loading its resources on first use"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = SurveyPDFTemplate()
+    return _template
+
+
+def create_survey_pdf(survey_data, survey_url):
+    """Create a PDF with company logo and QR code for the survey"""
+    return get_pdf_template().render(survey_data, survey_url)
+
+
+# Print sheet: many survey QR cards in one document, written object by object
+# so each page can be sent as soon as it is laid out
+PRINT_SHEET_PAGE = A4
+PRINT_SHEET_MARGIN = 36
+PRINT_SHEET_GUTTER = 18
+TITLE_RGB = (0.4, 0.494, 0.918)  # #667eea
+TEXT_RGB = (0.176, 0.216, 0.282)  # #2d3748
+
 
-    # Add QR code instructions
-    instructions = [
+def _num(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
 
+
+def _pdf_text(text):
+    """PDF literal string in WinAnsiEncoding"""
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _fit_text(text, font, size, width):
+    """Truncate text with an ellipsis so it fits in width points"""
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '…', font, size) > width:
+        text = text[:-1]
+    return text + '…'
+
+
+class StreamingPDFWriter:
+    """Minimal PDF writer that hands back each object's bytes as soon as it is written"""
+
+    def __init__(self):
+        self.offsets = {}
+        self.position = 0
+        self.last_id = 0
+
+    def reserve(self):
+        self.last_id += 1
+        return self.last_id
+
+    def _emit(self, data):
+        self.position += len(data)
+        return data
+
+    def header(self):
+        return self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        return self._emit(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    def stream(self, object_id, entries, data):
+        body = b'<< ' + entries + b' /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+        return self.object(object_id, body)
+
+    def trailer(self, root_id):
+        xref_offset = self.position
+        lines = [b'xref\n0 %d\n' % (self.last_id + 1), b'0000000000 65535 f \n']
+        lines.extend(b'%010d 00000 n \n' % self.offsets[object_id] for object_id in range(1, self.last_id + 1))
+        lines.append(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                     % (self.last_id + 1, root_id, xref_offset))
+        return self._emit(b''.join(lines))
+
+
+def _draw_card(ops, survey_data, survey_url, x, y, width, height, logo):
+    """Append the content-stream operators for one survey card"""
+    scale = max(0.6, min(1.6, min(width, height) / 250))
+    padding = 10 * scale
+    inner_width = width - 2 * padding
+    center = x + width / 2
+    top = y + height - padding
+
+    ops.append(b'q 0.85 G 0.75 w %s %s %s %s re S Q' % tuple(_num(v).encode() for v in (x, y, width, height)))
+
+    if logo is not None:
+        logo_width = inner_width
+        logo_height = logo_width * logo.height / logo.width
+        if logo_height > height * 0.18:
+            logo_height = height * 0.18
+            logo_width = logo_height * logo.width / logo.height
+        top -= logo_height
+        ops.append(b'q %s 0 0 %s %s %s cm /Logo Do Q' % tuple(
+            _num(v).encode() for v in (logo_width, logo_height, center - logo_width / 2, top)))
+        top -= 6 * scale
+
+    lines = [
+        ('Helvetica-Bold', 13 * scale, TITLE_RGB, survey_data.get('trip_name', 'N/A')),
+        ('Helvetica', 9 * scale, TEXT_RGB, survey_data.get('company_name', 'N/A')),
+        ('Helvetica', 9 * scale, TEXT_RGB, f"{survey_data.get('location', 'N/A')} - {survey_data.get('date', 'N/A')}"),
     ]
+    for font, size, rgb, text in lines:
+        text = _fit_text(str(text), font, size, inner_width)
+        top -= size * 1.25
+        text_x = center - stringWidth(text, font, size) / 2
+        ops.append(b'BT /%s %s Tf %s %s %s rg %s %s Td %s Tj ET' % (
+            b'F2' if font == 'Helvetica-Bold' else b'F1', _num(size).encode(),
+            *(_num(c).encode() for c in rgb), _num(text_x).encode(), _num(top).encode(), _pdf_text(text)))
+
+    url_size = 6.5 * scale
+    url_text = _fit_text(survey_url, 'Helvetica', url_size, inner_width)
+    bottom = y + padding
+    ops.append(b'BT /F1 %s Tf 0.4 0.4 0.4 rg %s %s Td %s Tj ET' % (
+        _num(url_size).encode(), _num(center - stringWidth(url_text, 'Helvetica', url_size) / 2).encode(),
+        _num(bottom).encode(), _pdf_text(url_text)))
+    bottom += url_size * 1.5
+
+    # QR code (quiet zone included) in the remaining space, as merged vector runs
+    size = min(inner_width, top - bottom - 4 * scale)
+    if size <= 0:
+        return
+    matrix = qr_matrix(survey_url)
+    modules = len(matrix)
+    module = size / modules
+    qr_x = center - size / 2
+    qr_y = bottom + (top - bottom - size) / 2
+    ops.append(b'q 0 g')
+    for row, start, length in qr_runs(matrix):
+        ops.append(b'%s %s %s %s re' % tuple(_num(v).encode() for v in (
+            qr_x + start * module, qr_y + (modules - row - 1) * module, length * module, module)))
+    ops.append(b'f Q')
+
+
+def iter_print_sheet(surveys, survey_url, columns=2, rows=2):
+    """Yield a PDF with one QR card per survey, columns x rows cards per page, page by page
+
+    survey_url(survey_data) returns the link encoded in each card. Fonts are the
+    base-14 Helvetica faces and the logo image is written once and shared by every page.
+    """
+    page_width, page_height = PRINT_SHEET_PAGE
+    card_width = (page_width - 2 * PRINT_SHEET_MARGIN - (columns - 1) * PRINT_SHEET_GUTTER) / columns
+    card_height = (page_height - 2 * PRINT_SHEET_MARGIN - (rows - 1) * PRINT_SHEET_GUTTER) / rows
+    per_page = columns * rows
+    logo = get_pdf_template().logo
 
-    for instruction in instructions:
-        elements.append(Paragraph(instruction, normal_style))
+    writer = StreamingPDFWriter()
+    catalog_id, pages_id, font_id, bold_font_id = (writer.reserve() for _ in range(4))
+    yield writer.header()
+    yield writer.object(font_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    yield writer.object(bold_font_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
 
-    elements.append(Spacer(1, 20))
+    xobjects = b''
+    if logo is not None:
+        logo_id = writer.reserve()
+        extra = b''
+        image, smask = logo.streams
+        if smask is not None:
+            smask_id = writer.reserve()
+            yield writer.stream(smask_id, *smask)
+            extra = b' /SMask %d 0 R' % smask_id
+        entries, data = image
+        yield writer.stream(logo_id, entries + extra, data)
+        xobjects = b' /XObject << /Logo %d 0 R >>' % logo_id
+    resources = b'<< /Font << /F1 %d 0 R /F2 %d 0 R >>%s >>' % (font_id, bold_font_id, xobjects)
 
-    # Add URL as text (backup)
-    url_text = f"<b>Link direto:</b> {survey_url}"
-    elements.append(Paragraph(url_text, normal_style))
+    page_ids = []
+    ops = []
 
-    # Build PDF
-    doc.build(elements)
+    def finish_page():
+        content_id, page_id = writer.reserve(), writer.reserve()
+        page_ids.append(page_id)
+        content = zlib.compress(b'\n'.join(ops))
+        ops.clear()
+        return (writer.stream(content_id, b'/Filter /FlateDecode', content) + writer.object(page_id, (
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Resources %s /Contents %d 0 R >>'
+            % (pages_id, _num(page_width).encode(), _num(page_height).encode(), resources, content_id))))
 
-    # Get the value of the BytesIO buffer and return
-    pdf_data = buffer.getvalue()
-    buffer.close()
+    slot = 0
+    for survey_data in surveys:
+        column, row = slot % columns, slot // columns
+        x = PRINT_SHEET_MARGIN + column * (card_width + PRINT_SHEET_GUTTER)
+        y = page_height - PRINT_SHEET_MARGIN - (row + 1) * card_height - row * PRINT_SHEET_GUTTER
+        _draw_card(ops, survey_data, survey_url(survey_data), x, y, card_width, card_height, logo)
+        slot += 1
+        if slot == per_page:
+            yield finish_page()
+            slot = 0
+    if slot or not page_ids:
+        yield finish_page()
 
-    return pdf_data
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    yield writer.object(pages_id, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids)))
+    yield writer.object(catalog_id, b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+    yield writer.trailer(catalog_id)
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from counters import Counters
+from database import get_store
+
+# Per-survey and per-respondent token buckets (capacity = burst, rate = tokens per second).
+# A whole tour group usually answers one survey at once, from one hotel or bus Wi-Fi
+SUBMIT_SURVEY_BURST = float(os.environ.get("SUBMIT_SURVEY_BURST", "120"))
+SUBMIT_SURVEY_RATE = float(os.environ.get("SUBMIT_SURVEY_RATE", "1"))
+# Respondents are keyed by client IP per survey, so one NAT only shares a bucket within its group
+SUBMIT_RESPONDENT_BURST = float(os.environ.get("SUBMIT_RESPONDENT_BURST", "60"))
+SUBMIT_RESPONDENT_RATE = float(os.environ.get("SUBMIT_RESPONDENT_RATE", "0.5"))
+# Seconds a throttled respondent is asked to wait
+RATE_LIMIT_RETRY_AFTER = int(os.environ.get("RATE_LIMIT_RETRY_AFTER", "30"))
+# Identical submissions (same survey, respondent and answers) inside this window are dropped
+SUBMISSION_DEDUP_WINDOW = float(os.environ.get("SUBMISSION_DEDUP_WINDOW", "600"))
+# Idle buckets and old fingerprints are pruned every this many checks
+RATE_LIMIT_PRUNE_EVERY = 200
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+RATE_LIMITED = "rate_limited"
+
+logger = logging.getLogger(__name__)
+
+_stats = Counters(
+    'checked',
+    'accepted',
+    'duplicates_dropped',
+    'rate_limited_survey',
+    'rate_limited_respondent'
+)
+
+
+def submission_fingerprint(survey_id, respondent, answers):
+    """Hash of who answered which survey with what"""
+    material = json.dumps([survey_id, respondent, sorted(answers.items())], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def check_submission(survey_id, respondent, answers):
+    """ACCEPTED, DUPLICATE (drop silently) or RATE_LIMITED for a survey submission"""
+    checked = _stats.increment('checked')
+    store = get_store()
+    if checked % RATE_LIMIT_PRUNE_EVERY == 0:
+        now = time.time()
+        idle = max(SUBMIT_SURVEY_BURST / SUBMIT_SURVEY_RATE, SUBMIT_RESPONDENT_BURST / SUBMIT_RESPONDENT_RATE)
+        store.prune_rate_limits(now - idle, now - SUBMISSION_DEDUP_WINDOW)
+
+    # Double taps never reach the buckets, so they cost the respondent nothing
+    fingerprint = submission_fingerprint(survey_id, respondent, answers)
+    if not store.claim_submission_fingerprint(fingerprint, SUBMISSION_DEDUP_WINDOW):
+        _stats.increment('duplicates_dropped')
+        logger.info(f"Dropped duplicate submission for survey {survey_id}")
+        return DUPLICATE
+
+    for kind, bucket_key, burst, rate in (
+        ('respondent', f"respondent:{survey_id}:{respondent}", SUBMIT_RESPONDENT_BURST, SUBMIT_RESPONDENT_RATE),
+        ('survey', f"survey:{survey_id}", SUBMIT_SURVEY_BURST, SUBMIT_SURVEY_RATE),
+    ):
+        if not store.take_token(bucket_key, burst, rate):
+            # A rejected submission was not recorded, so its retry must not count as a duplicate
+            store.release_submission_fingerprint(fingerprint)
+            _stats.increment(f'rate_limited_{kind}')
+            logger.warning(f"Rate limited submission for survey {survey_id} ({bucket_key})")
+            return RATE_LIMITED
+
+    _stats.increment('accepted')
+    return ACCEPTED
+
+
+def release_submission(survey_id, respondent, answers):
+    """Forget an accepted submission's fingerprint (when it could not be recorded after all)"""
+    get_store().release_submission_fingerprint(submission_fingerprint(survey_id, respondent, answers))
+
+
+def get_rate_limit_stats():
+    return _stats.snapshot()
@@ -0,0 +1,211 @@
+"""Render survey PDFs and images for many surveys across CPU cores.
+
+Usage: python render_service.py --base-url URL --out DIR|FILE.zip [--ids 1,2,3] [--workers N]
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", str(os.cpu_count() or 1)))
+RENDER_KINDS = ('pdf', 'image')
+
+logger = logging.getLogger(__name__)
+
+
+def survey_url_for(base_url, survey_id):
+    return f"{base_url.rstrip('/')}/survey/{survey_id}"
+
+
+def _warm(image_profile):
+    """Pool initializer: load the PDF template and image background once per worker"""
+    from pdf_generator import get_pdf_template
+    from image_generator import get_background, get_image_profile
+    get_pdf_template()
+    get_background()
+    get_image_profile(image_profile)
+
+
+def render_survey(survey_data, survey_url, kinds=RENDER_KINDS, image_profile=None, submitted_at=None):
+    """Render the requested artifacts for one survey; returns a result dict with per-stage timings"""
+    from pdf_generator import create_survey_pdf
+    from image_generator import create_survey_image, get_image_profile
+
+    started = time.time()
+    result = {
+        'survey_id': str(survey_data.get('survey_id')),
+        'trip_name': survey_data.get('trip_name'),
+        'artifacts': {},
+        'timings': {'wait': round((started - submitted_at) * 1000, 1) if submitted_at else 0.0},
+        'errors': {}
+    }
+
+    for kind in kinds:
+        stage_started = time.perf_counter()
+        try:
+            if kind == 'pdf':
+                data, extension = create_survey_pdf(survey_data, survey_url), 'pdf'
+            elif kind == 'image':
+                profile = get_image_profile(image_profile)
+                data, extension = create_survey_image(survey_data, survey_url, profile), profile.extension
+            else:
+                raise ValueError(f"Unknown artifact kind '{kind}'")
+            if not data:
+                raise RuntimeError(f"{kind} rendering returned no data")
+            result['artifacts'][kind] = (extension, data)
+        except Exception as e:
+            result['errors'][kind] = str(e)
+        result['timings'][kind] = round((time.perf_counter() - stage_started) * 1000, 1)
+
+    result['timings']['total'] = round((time.time() - started) * 1000, 1)
+    return result
+
+
+class RenderService:
+    """Render artifacts for a set of surveys on a process pool, streaming results as they finish"""
+
+    def __init__(self, workers=RENDER_WORKERS, kinds=RENDER_KINDS, image_profile=None):
+        self.workers = max(1, workers)
+        self.kinds = tuple(kinds)
+        self.image_profile = image_profile
+        self.rendered = 0
+        self.failed = 0
+        self.stage_ms = {}
+        self.elapsed = 0.0
+
+    def _record(self, result):
+        if result['errors']:
+            self.failed += 1
+        else:
+            self.rendered += 1
+        for stage, ms in result['timings'].items():
+            self.stage_ms.setdefault(stage, []).append(ms)
+        return result
+
+    def render(self, surveys, base_url):
+        """Yield one result per survey, in completion order"""
+        started = time.perf_counter()
+        surveys = iter(surveys)
+
+        if self.workers == 1:
+            # Serial, in-process (warm resources are shared through the module singletons)
+            for survey_data in surveys:
+                yield self._record(render_survey(
+                    survey_data, survey_url_for(base_url, survey_data['survey_id']),
+                    self.kinds, self.image_profile, time.time()
+                ))
+            self.elapsed = time.perf_counter() - started
+            return
+
+        with ProcessPoolExecutor(self.workers, initializer=_warm, initargs=(self.image_profile,)) as pool:
+            pending = set()
+            # Keep a bounded number of renders in flight so results are streamed, not buffered
+            max_in_flight = self.workers * 2
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_in_flight:
+                    survey_data = next(surveys, None)
+                    if survey_data is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(
+                        render_survey, survey_data, survey_url_for(base_url, survey_data['survey_id']),
+                        self.kinds, self.image_profile, time.time()
+                    ))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._record(future.result())
+
+        self.elapsed = time.perf_counter() - started
+
+    def summary(self):
+        """Counts, throughput and mean/max milliseconds per stage"""
+        total = self.rendered + self.failed
+        return {
+            'workers': self.workers,
+            'surveys': total,
+            'rendered': self.rendered,
+            'failed': self.failed,
+            'seconds': round(self.elapsed, 2),
+            'surveys_per_second': round(total / self.elapsed, 1) if self.elapsed > 0 else None,
+            'stages': {
+                stage: {'mean_ms': round(sum(values) / len(values), 1), 'max_ms': max(values)}
+                for stage, values in self.stage_ms.items()
+            }
+        }
+
+
+def artifact_filename(result, kind, extension):
+    """File name for an artifact: survey ID plus a filesystem-safe trip name"""
+    trip = re.sub(r'[^\w\s-]', '', result.get('trip_name') or '')
+    trip = re.sub(r'[-\s]+', '_', trip).strip('_')
+    stem = f"{result['survey_id']}_{trip}" if trip else result['survey_id']
+    return f"{stem}.{extension}" if kind == 'pdf' else f"{stem}_qr.{extension}"
+
+
+def write_results(results, out):
+    """Write streamed results to a directory or a .zip file; yields each result after writing it"""
+    if out.lower().endswith('.zip'):
+        # PDFs and images are already compressed
+        with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for result in results:
+                for kind, (extension, data) in result['artifacts'].items():
+                    archive.writestr(artifact_filename(result, kind, extension), data)
+                yield result
+    else:
+        os.makedirs(out, exist_ok=True)
+        for result in results:
+            for kind, (extension, data) in result['artifacts'].items():
+                with open(os.path.join(out, artifact_filename(result, kind, extension)), 'wb') as artifact_file:
+                    artifact_file.write(data)
+            yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", required=True, help="public URL of the app, used for survey links")
+    parser.add_argument("--out", required=True, help="output directory, or a path ending in .zip")
+    parser.add_argument("--ids", help="comma-separated survey IDs (default: every stored survey)")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS)
+    parser.add_argument("--kinds", default=",".join(RENDER_KINDS), help="pdf, image or both")
+    parser.add_argument("--image-profile", help="image output profile (see image_generator.IMAGE_PROFILES)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from database import init_database, get_all_surveys
+    from monday_items import load_survey
+
+    init_database()
+    if args.ids:
+        surveys = []
+        for survey_id in (value.strip() for value in args.ids.split(',')):
+            survey_data = load_survey(survey_id) if survey_id else None
+            if survey_data is None:
+                logger.warning(f"Survey {survey_id} not found, skipping")
+                continue
+            surveys.append(survey_data)
+    else:
+        surveys = get_all_surveys()
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    service = RenderService(args.workers, kinds, args.image_profile)
+    for result in write_results(service.render(surveys, args.base_url), args.out):
+        if result['errors']:
+            logger.error(f"Survey {result['survey_id']} failed: {result['errors']}")
+        else:
+            logger.info(f"Survey {result['survey_id']} rendered in {result['timings']['total']} ms")
+
+    summary = service.summary()
+    print(json.dumps(summary, indent=2))
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
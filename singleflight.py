@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Cross-process coalescing (gunicorn workers on one host) through lock files
+SINGLEFLIGHT_FILE_LOCKS = os.environ.get("SINGLEFLIGHT_FILE_LOCKS", "1") == "1"
+SINGLEFLIGHT_LOCK_DIR = os.environ.get("SINGLEFLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "avaliacao_locks"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        """Run func() once per key at a time; concurrent callers get the same result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'shared': self.shared,
+                'in_flight': len(self._calls)
+            }
+
+
+@contextmanager
+def file_lock(key):
+    """Hold an exclusive per-key lock shared by every process on this host"""
+    if not SINGLEFLIGHT_FILE_LOCKS or fcntl is None:
+        yield
+        return
+
+    os.makedirs(SINGLEFLIGHT_LOCK_DIR, exist_ok=True)
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    with open(os.path.join(SINGLEFLIGHT_LOCK_DIR, f"{name}.lock"), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -4,6 +4,18 @@ document.addEventListener('DOMContentLoaded', function() {
     const submitBtn = document.getElementById('submitBtn');
     const surveyForm = document.getElementById('surveyForm');
     const ratingCircles = document.querySelectorAll('.rating-circle');
+    const rateLimitMessage = 'Muitas respostas em pouco tempo. Aguarde um instante e envie novamente; suas respostas foram mantidas.';
+
+    // One token per page load: a double tap resends it (and is dropped as a duplicate),
+    // while people answering from the same network get different ones
+    if (surveyForm && !surveyForm.querySelector('input[name="submission_token"]')) {
+        const tokenInput = document.createElement('input');
+        tokenInput.type = 'hidden';
+        tokenInput.name = 'submission_token';
+        tokenInput.value = window.crypto && crypto.randomUUID ? crypto.randomUUID() :
+            Date.now().toString(36) + Math.random().toString(36).slice(2);
+        surveyForm.appendChild(tokenInput);
+    }
 
     // Initialize rating circles
     ratingCircles.forEach(circle => {
@@ -176,6 +188,38 @@ document.addEventListener('DOMContentLoaded', function() {
         return true;
     }
 
+    // Answers sent back by the server when a submission has to be retried
+    function restoreAnswers() {
+        const answersElement = document.getElementById('surveyAnswers');
+        if (!answersElement) {
+            return;
+        }
+        const answers = JSON.parse(answersElement.textContent);
+        Object.keys(answers).forEach(name => {
+            const value = answers[name][0];
+            const radio = document.querySelector(`input[type="radio"][name="${name}"][value="${value}"]`);
+            const circle = document.querySelector(`.rating-circle[data-name="${name}"][data-value="${value}"]`);
+            const field = document.querySelector(`textarea[name="${name}"], input[type="hidden"][name="${name}"]`);
+            if (radio) {
+                radio.checked = true;
+                radio.dispatchEvent(new Event('change'));
+            } else if (circle) {
+                selectRating(name, value, circle);
+            } else if (field) {
+                field.value = value;
+            }
+        });
+    }
+
+    restoreAnswers();
+
+    function resetSubmitButton() {
+        if (submitBtn) {
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = '<i class="fas fa-paper-plane"></i> Enviar Avaliação';
+        }
+    }
+
     function showLoadingState() {
         if (submitBtn) {
             submitBtn.disabled = true;
@@ -213,7 +257,11 @@ document.addEventListener('DOMContentLoaded', function() {
                     body: submitData
                 })
                 .then(response => {
-                    if (response.redirected) {
+                    if (response.status === 429) {
+                        // Throttled: keep everything on the page so the respondent can resend it
+                        alert(rateLimitMessage);
+                        resetSubmitButton();
+                    } else if (response.redirected) {
                         // Follow the redirect
                         window.location.href = response.url;
                     } else if (response.ok) {
@@ -227,11 +275,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 .catch(error => {
                     console.error('Form submission error:', error);
                     alert('Erro ao enviar formulário. Tente novamente.');
-                    // Reset button state
-                    if (submitBtn) {
-                        submitBtn.disabled = false;
-                        submitBtn.innerHTML = '<i class="fas fa-paper-plane"></i> Enviar Avaliação';
-                    }
+                    resetSubmitButton();
                 });
             } else {
                 console.log('Form validation failed');
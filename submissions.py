@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from database import get_store
+from monday_client import get_client, MondayAPIError
+
+# Survey answers are written to a local log first and sent to Monday.com in batches
+RESULTS_BOARD_ID = os.environ.get("MONDAY_RESULTS_BOARD_ID", "9242892489")
+SUBMISSIONS_BATCH_SIZE = int(os.environ.get("SUBMISSIONS_BATCH_SIZE", "10"))
+SUBMISSIONS_FLUSH_INTERVAL = float(os.environ.get("SUBMISSIONS_FLUSH_INTERVAL", "2"))
+SUBMISSIONS_MAX_ATTEMPTS = int(os.environ.get("SUBMISSIONS_MAX_ATTEMPTS", "10"))
+SUBMISSIONS_RETRY_DELAY = float(os.environ.get("SUBMISSIONS_RETRY_DELAY", "15"))
+SUBMISSIONS_RETRY_MAX = float(os.environ.get("SUBMISSIONS_RETRY_MAX", "1800"))
+SUBMISSIONS_LEASE_SECONDS = float(os.environ.get("SUBMISSIONS_LEASE_SECONDS", "120"))
+SUBMISSIONS_KEEP_SENT_SECONDS = float(os.environ.get("SUBMISSIONS_KEEP_SENT_SECONDS", str(7 * 24 * 3600)))
+# Vercel freezes the function after the response, so flush inline there instead of in a thread
+SUBMISSIONS_BACKGROUND = os.environ.get("SUBMISSIONS_BACKGROUND", "0" if os.environ.get("VERCEL") else "1") == "1"
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+
+def build_result_item(survey_data):
+    """Item name and column values of the results-board item for a submission"""
+    # Build column values with all survey data using correct Monday.com column IDs
+    column_values = {}
+
+    # Original Monday.com data
+    if survey_data.get('company_name'):
+        column_values["text_mkrjdnry"] = survey_data['company_name']
+
+    if survey_data.get('location'):
+        column_values["text_mkrb17ct"] = survey_data['location']
+
+    if survey_data.get('original_date'):
+        column_values["date_mkrjxb5d"] = survey_data['original_date']
+
+    if survey_data.get('board_relation_value'):
+        column_values["text_mkrb96zz"] = survey_data['board_relation_value']
+
+    # Aérea (Sim ou Não) - only send if "sim"
+    if survey_data.get('used_air_travel') == 'sim':
+        column_values["dropdown_mkrj4m2n"] = 'sim'
+
+    # Nota aéreo
+    if survey_data.get('air_rating'):
+        column_values["numeric_mkrjqam"] = str(survey_data['air_rating'])
+
+    # Hotel 1 name and rating
+    if survey_data.get('hotel_1_name'):
+        column_values["text_mkrjf13y"] = survey_data['hotel_1_name']
+    if survey_data.get('hotel_1_rating'):
+        column_values["numeric_mkrjpfxv"] = str(survey_data['hotel_1_rating'])
+
+    # Hotel 2 name and rating
+    if survey_data.get('hotel_2_name'):
+        column_values["text_mkrjk4yg"] = survey_data['hotel_2_name']
+    if survey_data.get('hotel_2_rating'):
+        column_values["numeric_mkrjg1ar"] = str(survey_data['hotel_2_rating'])
+
+    # Guias rating
+    if survey_data.get('guides_rating'):
+        column_values["numeric_mkrj330c"] = str(survey_data['guides_rating'])
+
+    # Restaurantes (Sim ou Não) - only send if "sim"
+    if survey_data.get('had_restaurants') == 'sim':
+        column_values["dropdown_mkrj9c4s"] = 'sim'
+
+    # Nota restaurantes
+    if survey_data.get('restaurants_rating'):
+        column_values["numeric_mkrjp7f9"] = str(survey_data['restaurants_rating'])
+
+    # Passeios e atividades (Sim ou Não) - only send if "sim"
+    if survey_data.get('had_activities') == 'sim':
+        column_values["dropdown_mkrjp8cd"] = 'sim'
+
+    # Nota Passeios e atividades
+    if survey_data.get('activities_rating'):
+        column_values["numeric_mkrj6132"] = str(survey_data['activities_rating'])
+
+    # Nota Viagem de forma geral
+    if survey_data.get('overall_rating'):
+        column_values["numeric_mkrjv5re"] = str(survey_data['overall_rating'])
+
+    # Comentários
+    if survey_data.get('comments'):
+        column_values["long_text_mkrjwfwx"] = survey_data['comments']
+
+    # Sugestão de Destino
+    if survey_data.get('next_destination'):
+        column_values["long_text_mkrjd4z0"] = survey_data['next_destination']
+
+    # Pass lookup_mkrkwqep value to text_mkrkqj1g column
+    if survey_data.get('lookup_mkrkwqep_value'):
+        column_values["text_mkrkqj1g"] = str(survey_data['lookup_mkrkwqep_value'])
+
+    # Use trip name as item name
+    item_name = survey_data.get('trip_name', 'Nova avaliação')
+    return item_name, column_values
+
+
+def batch_create_items_mutation(count):
+    """One GraphQL document creating count items through aliased create_item fields"""
+    variables = ", ".join(f"$name{i}: String!, $columns{i}: JSON!" for i in range(count))
+    fields = "\n".join(
+        f"    item{i}: create_item(board_id: $boardId, item_name: $name{i}, column_values: $columns{i}) {{ id }}"
+        for i in range(count)
+    )
+    return f"mutation($boardId: ID!, {variables}) {{\n{fields}\n}}"
+
+
+def _alias_errors(result):
+    """GraphQL errors by alias (None for errors not tied to one item)"""
+    errors = {}
+    for error in result.get('errors') or []:
+        path = error.get('path') if isinstance(error, dict) else None
+        alias = path[0] if path else None
+        message = error.get('message', str(error)) if isinstance(error, dict) else str(error)
+        errors.setdefault(alias, []).append(message)
+    return errors
+
+
+class SubmissionWriter:
+    """Write-ahead log of survey submissions with a background batch flusher"""
+
+    def __init__(self, batch_size=SUBMISSIONS_BATCH_SIZE, interval=SUBMISSIONS_FLUSH_INTERVAL,
+                 background=SUBMISSIONS_BACKGROUND):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.background = background
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_error = None
+        self.last_flush_at = None
+
+    def record(self, survey_id, survey_data):
+        """Durably accept a submission; Monday.com is written later"""
+        submission_id = uuid.uuid4().hex
+        get_store().add_submission(submission_id, survey_id, survey_data)
+
+        if self.background:
+            self.start()
+            with self._wakeup:
+                self._wakeup.notify()
+        else:
+            try:
+                self.flush()
+            except Exception as e:
+                # The submission is already logged; a later flush will retry it
+                logger.warning(f"Inline submission flush failed: {e}")
+        return submission_id
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="submission-flusher", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Submission flusher error")
+            with self._wakeup:
+                self._wakeup.wait(self.interval)
+
+    def flush(self):
+        """Send every due submission in batches; returns how many were sent"""
+        store = get_store()
+        sent = 0
+        while True:
+            leased = store.lease_submissions(self.batch_size, SUBMISSIONS_LEASE_SECONDS)
+            if not leased:
+                break
+            sent += self._send_batch(store, leased)
+            if len(leased) < self.batch_size:
+                break
+        if store.prune_submissions(time.time() - SUBMISSIONS_KEEP_SENT_SECONDS):
+            logger.info("Pruned old sent submissions")
+        self.last_flush_at = time.time()
+        return sent
+
+    def _send_batch(self, store, leased):
+        variables = {"boardId": RESULTS_BOARD_ID}
+        for i, (_, _, payload, _) in enumerate(leased):
+            item_name, column_values = build_result_item(payload)
+            variables[f"name{i}"] = item_name
+            variables[f"columns{i}"] = json.dumps(column_values)
+
+        try:
+            # Not replayed on read timeouts: a retry could create the items twice
+            result = get_client().execute(batch_create_items_mutation(len(leased)), variables)
+        except MondayAPIError as e:
+            result = {'errors': [{'message': str(e)}]}
+
+        data = result.get('data') or {}
+        errors = _alias_errors(result)
+        sent = 0
+        for i, (submission_id, survey_id, _, attempts) in enumerate(leased):
+            alias = f"item{i}"
+            item = data.get(alias)
+            if item and item.get('id'):
+                store.complete_submission(submission_id, str(item['id']))
+                sent += 1
+                continue
+
+            message = "; ".join(errors.get(alias) or errors.get(None) or ["No item returned"])
+            attempts += 1
+            if attempts >= SUBMISSIONS_MAX_ATTEMPTS:
+                status, next_attempt_at = FAILED, 0
+                logger.error(f"Giving up on submission {submission_id} for survey {survey_id}: {message}")
+            else:
+                status = PENDING
+                next_attempt_at = time.time() + min(SUBMISSIONS_RETRY_MAX, SUBMISSIONS_RETRY_DELAY * 2 ** (attempts - 1))
+                logger.warning(f"Submission {submission_id} for survey {survey_id} will be retried: {message}")
+            store.retry_submission(submission_id, status, next_attempt_at, message[:1000])
+            with self._stats_lock:
+                self.last_error = message
+                if status == FAILED:
+                    self.failed += 1
+                else:
+                    self.retried += 1
+
+        with self._stats_lock:
+            self.batches += 1
+            self.sent += sent
+        logger.info(f"Sent {sent}/{len(leased)} submissions to Monday.com in one request")
+        return sent
+
+    def stats(self):
+        """Backlog by status plus flusher counters"""
+        backlog = get_store().submission_backlog()
+        pending, oldest = backlog.get(PENDING, (0, None))
+        with self._stats_lock:
+            return {
+                'pending': pending,
+                'oldest_pending_seconds': round(time.time() - oldest, 1) if oldest else None,
+                'failed': backlog.get(FAILED, (0, None))[0],
+                'sent_retained': backlog.get(SENT, (0, None))[0],
+                'batches': self.batches,
+                'sent': self.sent,
+                'retried': self.retried,
+                'gave_up': self.failed,
+                'last_error': self.last_error,
+                'background': self.background
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_submission_writer():
+    """Get the process-wide submission writer"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SubmissionWriter()
+    return _writer
+
+
+def record_submission(survey_id, survey_data):
+    return get_submission_writer().record(survey_id, survey_data)
+
+
+def get_submission_stats():
+    return get_submission_writer().stats()
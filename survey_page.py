@@ -0,0 +1,71 @@
+import logging
+import os
+
+from markupsafe import Markup, escape
+
+from artifact_cache import BoundedLRU, artifact_key
+from singleflight import SingleFlight
+
+# Rendered survey pages are kept in memory by a hash of the fields the template uses
+SURVEY_PAGE_CACHE_BYTES = int(os.environ.get("SURVEY_PAGE_CACHE_BYTES", str(4 * 1024 * 1024)))
+
+# Bump when templates/survey.html (or a fragment below) changes
+SURVEY_PAGE_VERSION = "3"
+# Survey fields read by templates/survey.html
+SURVEY_PAGE_FIELDS = ('survey_id', 'trip_name', 'company_name', 'location', 'date', 'has_guides', 'hotel_1', 'hotel_2')
+
+# Hidden inputs that get a 1-10 rating widget
+RATING_FIELDS = ('air_rating', 'guides_rating', 'hotel_1_rating', 'hotel_2_rating',
+                 'restaurants_rating', 'activities_rating', 'overall_rating')
+
+logger = logging.getLogger(__name__)
+
+
+def _rating_circles_html(name):
+    name = escape(name)
+    return "".join(
+        f'\n<div class="rating-circle" data-value="{i}" data-name="{name}">\n    <span>{i}</span>\n</div>'
+        for i in range(1, 11)
+    ) + "\n"
+
+
+# Rendered once at import instead of looping in Jinja on every request
+_rating_widgets = {name: Markup(_rating_circles_html(name)) for name in RATING_FIELDS}
+
+
+def rating_circles(name):
+    """The 1-10 rating circles feeding the hidden input called name (Jinja global)"""
+    widget = _rating_widgets.get(name)
+    if widget is None:
+        widget = Markup(_rating_circles_html(name))
+    return widget
+
+
+def survey_page_key(survey_data, script_root='', asset_version=''):
+    """Cache key (and ETag) for a survey's form page"""
+    # The page links the fingerprinted bundles, so a new build must change the ETag
+    return artifact_key('page', SURVEY_PAGE_VERSION, SURVEY_PAGE_FIELDS, survey_data, f"{script_root}|{asset_version}")
+
+
+_cache = BoundedLRU(SURVEY_PAGE_CACHE_BYTES)
+_renders = SingleFlight()
+
+
+def get_survey_page(key, render):
+    """Return the page bytes for key, calling render() only on a miss (once per key at a time)"""
+    page = _cache.get(key)
+    if page is not None:
+        return page
+
+    def render_and_store():
+        rendered = render()
+        _cache.put(key, rendered)
+        return rendered
+
+    return _renders.do(key, render_and_store)
+
+
+def get_survey_page_stats():
+    stats = _cache.stats()
+    stats['renders'] = _renders.stats()
+    return stats
@@ -0,0 +1,204 @@
+import logging
+from flask import Blueprint, current_app, request, render_template, redirect, url_for, flash, send_file
+from database import increment_submission_count
+from monday_items import load_survey
+from ratelimit import check_submission, release_submission, DUPLICATE, RATE_LIMITED, RATE_LIMIT_RETRY_AFTER
+from submissions import record_submission, get_submission_writer, SUBMISSIONS_BACKGROUND
+from survey_page import rating_circles, survey_page_key, get_survey_page
+from assets import get_asset_version
+from image_derivatives import picture, image_url, resolve_variant, get_favicon, derivatives_version, DERIVATIVE_MAX_AGE, DERIVATIVE_IMMUTABLE_AGE
+
+logger = logging.getLogger(__name__)
+
+# Resume sending submissions left in the log by a previous run
+if SUBMISSIONS_BACKGROUND:
+    get_submission_writer().start()
+
+bp = Blueprint('survey', __name__)
+
+# Pre-rendered rating widgets used by templates/survey.html
+bp.add_app_template_global(rating_circles)
+# Responsive, correctly typed variants of static/images
+bp.add_app_template_global(picture)
+bp.add_app_template_global(image_url)
+
+@bp.route('/survey/<survey_id>')
+def survey_form(survey_id):
+    """Display the NPS survey form"""
+    # Clear any existing flash messages when accessing the survey form. This also keeps
+    # the rendered page free of per-session content, so it can be shared from the cache;
+    # the session cookie is only rewritten when there is something to clear.
+    from flask import session
+    if '_flashes' in session:
+        session.pop('_flashes', None)
+
+    survey = load_survey(survey_id)
+
+    if not survey:
+        return "Pesquisa não encontrada", 404
+
+    # The page only depends on a few survey fields, so it is rendered once per content hash
+    page_key = survey_page_key(survey, request.script_root, f"{get_asset_version()}:{derivatives_version()}")
+    if request.if_none_match.contains(page_key):
+        response = current_app.response_class(status=304)
+    else:
+        page = get_survey_page(page_key, lambda: render_template('survey.html', survey=survey).encode('utf-8'))
+        response = current_app.response_class(page, mimetype='text/html')
+    response.set_etag(page_key)
+    # Revalidate every time: survey details can change in Monday.com at any moment
+    response.cache_control.no_cache = True
+    return response
+
+@bp.route('/survey/<survey_id>/submit', methods=['POST'])
+def submit_survey(survey_id):
+    """Handle survey submission"""
+    survey = load_survey(survey_id)
+
+    if not survey:
+        return "Pesquisa não encontrada", 404
+
+    try:
+        # Get all form data
+        overall_rating = request.form.get('overall_rating')
+        overall_rating = int(overall_rating) if overall_rating else None
+
+        # Get optional ratings and convert to int if not empty
+        air_rating = request.form.get('air_rating')
+        air_rating = int(air_rating) if air_rating and air_rating.strip() else None
+
+        guides_rating = request.form.get('guides_rating')
+        guides_rating = int(guides_rating) if guides_rating and guides_rating.strip() else None
+
+        hotel_1_rating = request.form.get('hotel_1_rating')
+        hotel_1_rating = int(hotel_1_rating) if hotel_1_rating and hotel_1_rating.strip() else None
+
+        hotel_2_rating = request.form.get('hotel_2_rating')
+        hotel_2_rating = int(hotel_2_rating) if hotel_2_rating and hotel_2_rating.strip() else None
+
+        restaurants_rating = request.form.get('restaurants_rating')
+        restaurants_rating = int(restaurants_rating) if restaurants_rating and restaurants_rating.strip() else None
+
+        activities_rating = request.form.get('activities_rating')
+        activities_rating = int(activities_rating) if activities_rating and activities_rating.strip() else None
+
+        # Get text responses
+        comments = request.form.get('comments', '').strip()
+        next_destination = request.form.get('next_destination', '').strip()
+
+        # Get yes/no responses
+        used_air_travel = request.form.get('used_air_travel')
+        had_guides = request.form.get('had_guides')
+        had_restaurants = request.form.get('had_restaurants')
+        had_activities = request.form.get('had_activities')
+
+        # Validate overall rating (mandatory)
+        if not overall_rating:
+            flash("Por favor, avalie a viagem de forma geral.", "error")
+            return redirect(f'/survey/{survey_id}')
+
+        if overall_rating < 1 or overall_rating > 10:
+            flash("Por favor, selecione uma avaliação válida entre 1 e 10.", "error")
+            return redirect(f'/survey/{survey_id}')
+
+        # Drop double taps and throttle floods before they reach the submission log and Monday.com
+        # remote_addr is the client address set by ProxyFix, not a header the client controls
+        respondent = request.remote_addr or ''
+        answers = request.form.to_dict(flat=False)
+        verdict = check_submission(survey_id, respondent, answers)
+        if verdict == DUPLICATE:
+            return redirect(f'/survey/{survey_id}/thank-you')
+        if verdict == RATE_LIMITED:
+            # Rendered (not cached) with the answers so nothing the respondent typed is lost
+            page = render_template('survey.html', survey=survey, answers=answers,
+                                   retry_message="Muitas respostas em pouco tempo. Aguarde um instante e envie novamente.")
+            return page, 429, {'Retry-After': str(RATE_LIMIT_RETRY_AFTER)}
+
+        # Get the lookup_mkrkwqep_value from the original survey
+        lookup_mkrkwqep_value = survey.get('lookup_mkrkwqep_value')
+
+        survey_data = {
+            'trip_name': survey['trip_name'],
+            'location': survey['location'],
+            'company_name': survey['company_name'],
+            'original_date': survey.get('original_date'),
+            'board_relation_value': survey.get('board_relation_value'),
+            'lookup_mkrkwqep_value': lookup_mkrkwqep_value,
+            'overall_rating': overall_rating,
+            'air_rating': air_rating,
+            'guides_rating': guides_rating,
+            'hotel_1_rating': hotel_1_rating,
+            'hotel_2_rating': hotel_2_rating,
+            'restaurants_rating': restaurants_rating,
+            'activities_rating': activities_rating,
+            'comments': comments,
+            'next_destination': next_destination,
+            'used_air_travel': used_air_travel,
+            'had_guides': had_guides,
+            'had_restaurants': had_restaurants,
+            'had_activities': had_activities,
+            'hotel_1_name': survey.get('hotel_1'),  # Hotel names from original Monday.com data
+            'hotel_2_name': survey.get('hotel_2')
+        }
+
+        # Answers go to the local submission log first; Monday.com items are created in batches
+        # by the background flusher, so respondents never wait on (or lose answers to) Monday.com
+        try:
+            submission_id = record_submission(survey_id, survey_data)
+        except Exception as e:
+            logger.error(f"Error recording submission: {str(e)}")
+            release_submission(survey_id, respondent, answers)
+            flash("Erro ao salvar resposta. Tente novamente.", "error")
+            return redirect(url_for('.survey_form', survey_id=survey_id))
+
+        # Increment submission count
+        increment_submission_count(survey_id)
+
+        logger.info(f"Submission {submission_id} recorded for survey {survey_id} (overall rating {overall_rating})")
+
+        flash("Obrigado pelo seu feedback!", "success")
+        return redirect(f'/survey/{survey_id}/thank-you')
+
+    except (ValueError, TypeError):
+        flash("Por favor, selecione uma avaliação válida.", "error")
+        return redirect(f'/survey/{survey_id}')
+    except Exception as e:
+        logger.error(f"Error submitting survey: {str(e)}")
+        flash("Ocorreu um erro ao enviar sua resposta. Por favor, tente novamente.", "error")
+        return redirect(f'/survey/{survey_id}')
+
+@bp.route('/survey/<survey_id>/thank-you')
+def thank_you(survey_id):
+    """Display thank you page"""
+    survey = load_survey(survey_id)
+
+    # If still no survey found, show thank you page without survey details
+    return render_template('thank_you.html', survey=survey)
+
+@bp.route('/img/<filename>')
+def image_variant(filename):
+    """Resized variant of a static image: fixed format with an extension, else negotiated by Accept"""
+    accepted = {mimetype for mimetype, quality in request.accept_mimetypes if quality > 0}
+    variant = resolve_variant(filename, accepted)
+    if variant is None:
+        return "Imagem não encontrada", 404
+
+    path, mimetype, versioned, negotiated = variant
+    response = send_file(path, mimetype=mimetype, max_age=DERIVATIVE_IMMUTABLE_AGE if versioned else DERIVATIVE_MAX_AGE)
+    if versioned:
+        response.cache_control.immutable = True
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+@bp.route('/favicon.ico')
+def favicon():
+    """Multi-resolution favicon built from the company logo"""
+    return send_file(get_favicon(), mimetype='image/vnd.microsoft.icon', max_age=DERIVATIVE_MAX_AGE)
+
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    return render_template('thank_you.html', survey=None, error="Página não encontrada"), 404
+
+@bp.app_errorhandler(500)
+def internal_error(error):
+    return render_template('thank_you.html', survey=None, error="Erro interno do servidor"), 500
@@ -0,0 +1,36 @@
+"""Keep the app's databases, caches and Monday.com calls inside a throwaway directory"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_scratch = tempfile.mkdtemp(prefix="avaliacao_tests_")
+for name, value in {
+    "SURVEYS_DB_PATH": os.path.join(_scratch, "surveys.db"),
+    "JOBS_DB_PATH": os.path.join(_scratch, "jobs.db"),
+    "ARTIFACT_CACHE_DIR": os.path.join(_scratch, "artifacts"),
+    "DERIVATIVES_DIR": os.path.join(_scratch, "derivatives"),
+    "BACKFILL_STATE_DIR": _scratch,
+    # Nothing listens here, so a stray API call fails fast instead of reaching Monday.com
+    "MONDAY_API_URL": "http://127.0.0.1:9/v2",
+    "SUBMISSIONS_BACKGROUND": "0",
+    "JOB_WORKERS": "0",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+    from database import init_database
+
+    init_database()
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
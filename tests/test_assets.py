@@ -0,0 +1,99 @@
+"""Static bundles built from the real Bootstrap / Font Awesome releases
+
+Downloads the pinned vendor archives into assets_vendor/ on the first run.
+"""
+import os
+import re
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets  # noqa: E402
+
+pytest.importorskip("tinycss2")
+pytest.importorskip("rcssmin")
+pytest.importorskip("rjsmin")
+
+
+def _classes(rules, alone=False):
+    """Classes in the selectors of parsed rules (alone: only selectors with a single class)"""
+    found = set()
+    for kind, node, body in rules:
+        if kind == 'rule':
+            for selector in node:
+                classes = assets.selector_classes(selector)
+                if not alone or len(classes) == 1:
+                    found.update(classes)
+        elif kind == 'block':
+            found |= _classes(body, alone)
+    return found
+
+
+def _read(static_dir, path):
+    with open(os.path.join(static_dir, *path.split('/')), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    static_dir = str(tmp_path_factory.mktemp("static"))
+    for directory in ('css', 'js'):
+        shutil.copytree(os.path.join(assets.STATIC_DIR, directory), os.path.join(static_dir, directory))
+    try:
+        manifest = assets.build(static_dir=static_dir)
+    except assets.AssetError as e:
+        pytest.skip(f"vendor releases unavailable: {e}")
+    return static_dir, manifest
+
+
+def test_selectors_used_by_templates_survive(built):
+    static_dir, manifest = built
+    _, bundle = assets.parse_css(_read(static_dir, manifest['files']['app.css']))
+    bundled = _classes(bundle)
+
+    usage = assets.scan_usage()
+    for source in ('bootstrap/css/bootstrap.css', 'fontawesome/css/all.css'):
+        with open(assets.vendor_path(source), encoding='utf-8') as f:
+            _, vendor = assets.parse_css(f.read())
+        # Every class our markup uses that the vendor styles on its own must still be styled
+        missing = {name for name in _classes(vendor, alone=True) if usage.uses_class(name)} - bundled
+        assert not missing, f"{source}: rules dropped for {sorted(missing)}"
+
+
+def test_runtime_classes_survive(built):
+    static_dir, manifest = built
+    css = _read(static_dir, manifest['files']['app.css'])
+    # Toggled by Bootstrap's alert plugin, form validation and survey.js
+    for name in ('fade', 'show', 'is-invalid', 'was-validated', 'alert-dismissible', 'btn-close',
+                 'alert-warning', 'alert-danger', 'fa-spinner', 'fa-spin', 'fa-paper-plane'):
+        assert re.search(r'\.%s(?![\w-])' % re.escape(name), css), name
+
+
+def test_bundle_urls_resolve(built):
+    static_dir, manifest = built
+    css = _read(static_dir, manifest['files']['app.css'])
+    fonts = re.findall(r'url\(([^)]+)\)', css)
+    assert any(font.endswith('.woff2') for font in fonts)
+    for reference in fonts:
+        # Rooted URLs are app routes (/img/...), not bundled files
+        if not reference.startswith(('data:', '/')):
+            path = os.path.normpath(os.path.join(static_dir, 'dist', 'css', reference.strip('"\'')))
+            assert os.path.isfile(path), reference
+
+
+def test_bootstrap_plugins_bundled(built):
+    static_dir, manifest = built
+    js = _read(static_dir, manifest['files']['survey.js'])
+    assert 'Bootstrap v5.3.8' in js
+    assert 'sourceMappingURL' not in js
+
+
+def test_committed_build_is_current():
+    # Deployments serve static/dist as committed; rebuild with `python assets.py build`
+    manifest = assets.load_manifest()
+    assert manifest is not None, "static/dist is missing or older than its sources"
+    for path in manifest['immutable']:
+        assert os.path.isfile(os.path.join(assets.STATIC_DIR, *path.split('/'))), path
@@ -0,0 +1,57 @@
+"""Background backfills resume from their saved cursor"""
+import backfill
+from jobs import JobQueue
+
+
+class FakeBudget:
+    total_used = 0
+    remaining = 1000
+
+
+class FakeBoard:
+    """items_page / next_items_page over three pages; page 2 fails once"""
+
+    budget = FakeBudget()
+
+    def __init__(self):
+        self.calls = []
+        self.failed = False
+
+    def execute(self, query, variables=None, idempotent=None):
+        cursor = variables.get('cursor')
+        self.calls.append(cursor)
+        if cursor is None:
+            return {'data': {'boards': [{'items_page': self._page(1, 'c1')}]}}
+        if cursor == 'c1' and not self.failed:
+            self.failed = True
+            raise ConnectionError("connection reset")
+        return {'data': {'next_items_page': self._page(2, 'c2') if cursor == 'c1' else self._page(3, None)}}
+
+    @staticmethod
+    def _page(number, cursor):
+        return {'cursor': cursor, 'items': [{'id': f'9{number}', 'name': f'Viagem {number}', 'column_values': []}]}
+
+
+def test_backfill_job_retry_resumes_from_cursor(tmp_path, monkeypatch, app):
+    board = FakeBoard()
+    monkeypatch.setattr(backfill, 'get_client', lambda: board)
+    monkeypatch.setattr(backfill, 'BACKFILL_STATE_DIR', str(tmp_path))
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.db'), workers=0)
+
+    job_id = queue.enqueue('board_backfill', {'board_id': '42', 'batch_size': 1, 'resume': False})
+    status = queue.get_status(job_id)
+    assert status['status'] == 'pending'
+    # The first page was saved and recorded on the job row before page 2 failed
+    assert status['steps']['progress'] == {'processed': 1, 'cursor': 'c1'}
+
+    assert queue.drain(timeout=10)
+    status = queue.get_status(job_id)
+    assert status['status'] == 'done', status['error']
+    assert status['result']['items'] == 3
+    # The retry did not go back to the first page
+    assert board.calls == [None, 'c1', 'c1', 'c2']
+
+
+def test_backfill_state_is_per_board(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, 'BACKFILL_STATE_DIR', str(tmp_path))
+    assert backfill.state_path('1') != backfill.state_path('2')
@@ -0,0 +1,25 @@
+"""The byte-bounded LRU behind the artifact memory tier and the survey page cache"""
+from artifact_cache import ArtifactCache, BoundedLRU
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = BoundedLRU(10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a') == b'aaaa'  # 'b' is now the oldest
+    cache.put('c', b'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa' and cache.get('c') == b'cccc'
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'max_bytes': 10, 'hits': 3, 'misses': 2, 'evictions': 1}
+
+
+def test_artifact_memory_tier_counts(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path), memory_bytes=10, disk_bytes=1024)
+    cache.put('a', b'aaaa')
+    assert cache.get('a') == b'aaaa'
+    cache.invalidate('a')
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['memory_entries'], stats['memory_bytes'], stats['memory_hits'], stats['misses']) == (0, 0, 1, 1)
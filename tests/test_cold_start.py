@@ -0,0 +1,22 @@
+"""Serving a survey page must not load the PDF, image or Monday.com libraries
+
+Set COLD_START_BUDGET_MS to also enforce the time budget (import + first page).
+"""
+import os
+
+import pytest
+
+from benchmarks import COLD_START_DEFERRED, run_cold_start
+
+
+@pytest.mark.parametrize("module", ["app", "api.index"])
+def test_first_survey_page_defers_heavy_imports(module):
+    report = run_cold_start(module)
+    assert report['status'] == 200
+    eager = [name for name in COLD_START_DEFERRED if name in report['modules']]
+    assert not eager, f"loaded to serve a survey page: {', '.join(eager)}"
+
+    budget_ms = os.environ.get("COLD_START_BUDGET_MS")
+    if budget_ms:
+        total_ms = report['import_ms'] + report['request_ms']
+        assert total_ms <= float(budget_ms), f"cold start took {total_ms:.1f} ms"
@@ -0,0 +1,22 @@
+"""QR codes are drawn as vector runs, which beats embedding the PNG"""
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, SimpleDocTemplate
+
+import pdf_generator
+
+SURVEY_URL = "https://avaliacaotop.vercel.app/survey/9876543210"
+
+
+def _build(flowable):
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4).build([flowable])
+    return buffer.getvalue()
+
+
+def test_vector_qr_pdf_is_smaller_than_png():
+    raster = _build(Image(pdf_generator.generate_qr_code(SURVEY_URL), width=3 * inch, height=3 * inch))
+    vector = _build(pdf_generator.VectorQRCode(SURVEY_URL, 3 * inch))
+    assert len(vector) < len(raster)
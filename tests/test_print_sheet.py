@@ -0,0 +1,79 @@
+"""Streamed print sheets are complete, well-formed PDFs"""
+import re
+import zlib
+
+from pdf_generator import get_pdf_template, iter_print_sheet
+
+
+def _surveys(count):
+    return [{'survey_id': str(i), 'trip_name': f'Viagem {i}', 'company_name': 'Empresa',
+             'location': 'Lisboa', 'date': '2026-10-18'} for i in range(count)]
+
+
+def check_pdf(data):
+    """Check the header, xref table and trailer; return {object id: body}"""
+    assert data.startswith(b'%PDF-1.')
+    assert data.endswith(b'%%EOF\n')
+    xref_offset = int(re.search(rb'startxref\n(\d+)\n%%EOF\n$', data).group(1))
+    assert data[xref_offset:].startswith(b'xref\n')
+    size = int(re.search(rb'/Size (\d+)', data[xref_offset:]).group(1))
+    entries = re.findall(rb'(\d{10}) (\d{5}) n ', data[xref_offset:])
+    assert len(entries) == size - 1
+
+    objects = {}
+    for object_id, (offset, _) in enumerate(entries, start=1):
+        start = int(offset)
+        assert data[start:].startswith(b'%d 0 obj\n' % object_id), object_id
+        objects[object_id] = data[start:data.index(b'\nendobj\n', start)]
+    return objects
+
+
+def stream_data(body):
+    length = int(re.search(rb'/Length (\d+)', body).group(1))
+    start = body.index(b'stream\n') + len(b'stream\n')
+    assert body[start + length:] == b'\nendstream'
+    return body[start:start + length]
+
+
+def page_count(objects):
+    pages = [body for body in objects.values() if re.search(rb'/Type /Page\b', body)]
+    counts = [int(re.search(rb'/Count (\d+)', body).group(1)) for body in objects.values() if b'/Type /Pages' in body]
+    assert counts == [len(pages)]
+    return len(pages)
+
+
+def test_print_sheet_streams_logo_and_pages():
+    data = b''.join(iter_print_sheet(_surveys(5), lambda survey: f"https://example.com/survey/{survey['survey_id']}",
+                                     columns=2, rows=2))
+    objects = check_pdf(data)
+    assert page_count(objects) == 2
+
+    logo = get_pdf_template().logo
+    assert logo is not None
+    images = [body for body in objects.values() if b'/Subtype /Image' in body]
+    # Logo pixels plus its alpha channel, written once for every page
+    assert len(images) == 2
+    for body in images:
+        channels = 3 if b'/DeviceRGB' in body else 1
+        assert len(zlib.decompress(stream_data(body))) == logo.width * logo.height * channels
+
+
+def test_print_sheet_route_streams_every_page(client):
+    from database import save_survey
+
+    surveys = _surveys(7)
+    for survey in surveys:
+        save_survey(survey['survey_id'], survey)
+    ids = ','.join(survey['survey_id'] for survey in surveys)
+
+    response = client.get(f'/print-sheet?ids={ids}&cols=1&rows=3')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/pdf'
+    # Consumes the whole generator, so errors after the headers surface here
+    objects = check_pdf(response.get_data())
+    assert page_count(objects) == 3
+    contents = b''.join(zlib.decompress(stream_data(body)) for body in objects.values()
+                        if b'/Filter /FlateDecode' in body and b'/Subtype /Image' not in body)
+    for survey in surveys:
+        assert f"(Viagem {survey['survey_id']})".encode() in contents
@@ -0,0 +1,37 @@
+"""Survey lookups honour TTL refreshes and upstream deletes"""
+import database
+from database import get_survey, lookup_survey, save_survey, survey_cache
+
+
+def _survey(survey_id, trip_name='Viagem'):
+    return {'survey_id': survey_id, 'trip_name': trip_name, 'company_name': 'Empresa',
+            'location': 'Lisboa', 'date': '2026-10-18'}
+
+
+def test_stale_survey_is_refreshed(app):
+    save_survey('cache-refresh', _survey('cache-refresh'))
+    survey_cache.put('cache-refresh', _survey('cache-refresh'), ttl=0)
+
+    refreshed = _survey('cache-refresh', 'Viagem nova')
+    assert lookup_survey('cache-refresh', lambda: refreshed) == refreshed
+    assert survey_cache.get('cache-refresh') == ('fresh', refreshed)
+
+
+def test_survey_deleted_upstream_stays_gone(app):
+    save_survey('cache-gone', _survey('cache-gone'))
+    survey_cache.put('cache-gone', _survey('cache-gone'), ttl=0)
+
+    assert lookup_survey('cache-gone', lambda: None) is None
+    # The stored row is still there, but direct reads must not resurrect it
+    assert database.get_store().get_survey('cache-gone') is not None
+    assert get_survey('cache-gone') is None
+    assert survey_cache.get('cache-gone') == ('gone', None)
+    assert lookup_survey('cache-gone', lambda: _survey('cache-gone')) is None
+
+
+def test_deleted_survey_pdf_is_not_served(client):
+    save_survey('cache-pdf', _survey('cache-pdf'))
+    survey_cache.put_gone('cache-pdf')
+
+    assert client.get('/survey/cache-pdf/pdf').status_code == 404
+    assert survey_cache.get('cache-pdf') == ('gone', None)
@@ -0,0 +1,115 @@
+import logging
+from flask import Blueprint, request, url_for, jsonify
+from database import save_survey
+from monday_columns import build_survey_data
+from idempotency import claim_webhook, release_webhook
+from monday_items import get_item_data
+from routes import survey_link
+from artifact_jobs import queue_survey_artifacts
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('webhook', __name__)
+
+@bp.route('/webhook/monday', methods=['GET', 'POST'])
+def monday_webhook():
+    """Handle Monday.com webhook with challenge response"""
+
+    logger.info(f"Webhook received - Method: {request.method}")
+    logger.debug(f"Headers: {dict(request.headers)}")
+
+    if request.method == 'GET':
+        # Handle challenge verification
+        challenge = request.args.get('challenge')
+        if challenge:
+            logger.info(f"GET challenge received: {challenge}")
+            return challenge, 200, {'Content-Type': 'text/plain'}
+        logger.info("GET request without challenge - endpoint ready")
+        return "Webhook endpoint ready", 200
+
+    elif request.method == 'POST':
+        claimed_event = None
+        try:
+            # Parse webhook data
+            data = request.get_json()
+            logger.debug(f"Webhook data received: {data}")
+
+            # Handle challenge response for POST requests
+            if data and 'challenge' in data:
+                challenge = data['challenge']
+                logger.info(f"POST challenge received: {challenge}")
+                return jsonify({'challenge': challenge}), 200
+
+            # Extract basic info from webhook
+            event_data = data.get('event', {})
+            pulse_id = event_data.get('pulseId')
+            trip_name = event_data.get('pulseName', 'Unknown Trip')
+
+            if not pulse_id:
+                return jsonify({"error": "No pulse ID found"}), 400
+
+            # Monday.com retries slow deliveries and may send several events for one change
+            if not claim_webhook(event_data):
+                return jsonify({"status": "duplicate", "survey_id": str(pulse_id)}), 200
+            claimed_event = event_data
+
+            # Fetch complete item data using GraphQL
+            logger.debug(f"Fetching data for item ID: {pulse_id}")
+            item_data_response = get_item_data(pulse_id)
+
+            column_values = []
+            if 'errors' in item_data_response:
+                logger.error(f"GraphQL error: {item_data_response['errors']}")
+            else:
+                items = (item_data_response.get('data') or {}).get('items') or []
+                if items:
+                    column_values = items[0].get('column_values', [])
+                else:
+                    logger.warning(f"No items found in GraphQL response for item {pulse_id}")
+
+            # Generate consistent survey ID based on pulse_id (just the number)
+            survey_id = str(pulse_id)
+
+            # Store survey data in database
+            survey_data = build_survey_data(pulse_id, trip_name, column_values)
+            location = survey_data['location']
+            date = survey_data['date']
+            company_name = survey_data['company_name']
+
+            logger.debug(f"Extracted - Location: {location}, Date: {date}, Company: {company_name}, "
+                         f"Hotels: {survey_data['hotel_1']} / {survey_data['hotel_2']}, Has guides: {survey_data['has_guides']}")
+
+            save_survey(survey_id, survey_data)
+
+            # Generate survey URL (the survey pages may be served by another pool)
+            survey_url = survey_link(survey_id)
+
+            # Link update, PDF and PNG run in the background so Monday.com gets its 200 right away.
+            # They only depend on the PDF fields and the URL, so skip them when those are unchanged
+            job_id = queue_survey_artifacts(survey_data, survey_url)
+            if job_id:
+                logger.info(f"Queued artifact job {job_id} for Monday.com item {pulse_id}")
+            else:
+                logger.info(f"Artifacts for Monday.com item {pulse_id} are up to date, not regenerating")
+
+            pdf_download_url = survey_link(survey_id, '/pdf')
+            logger.info(f"Survey {survey_id} saved for trip '{trip_name}' ({location}, {date}): {survey_url}")
+
+            return jsonify({
+                "status": "success",
+                "survey_id": survey_id,
+                "survey_url": survey_url,
+                "pdf_download_url": pdf_download_url,
+                "job_id": job_id,
+                "job_status_url": url_for('core.job_status', job_id=job_id, _external=True) if job_id else None
+            }), 200
+
+        except Exception as e:
+            logger.error(f"Error processing webhook: {str(e)}")
+            # Let Monday.com's retry of this delivery through instead of answering it as a duplicate
+            if claimed_event is not None:
+                try:
+                    release_webhook(claimed_event)
+                except Exception as release_error:
+                    logger.error(f"Could not release webhook claim: {release_error}")
+            return jsonify({"error": "Failed to process webhook"}), 500